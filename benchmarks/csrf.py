@@ -0,0 +1,301 @@
+"""
+benchmarks.csrf
+
+Throughput and latency benchmarks for CSRF token generation, validation
+and the ``CSRFProtect`` before request hook.
+::
+    python -m benchmarks.csrf              # compare against the baseline
+    python -m benchmarks.csrf --save       # store a new baseline
+    python -m benchmarks.csrf --quick      # fewer requests, for smoke runs
+
+The run exits with status 1 if any scenario's throughput drops more than
+``--tolerance`` below the stored baseline. Baselines are machine specific,
+save a new one before comparing on different hardware.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+
+from quart import Quart, g
+from quart.datastructures import FileStorage
+from werkzeug.test import encode_multipart
+
+from quart_wtf import CSRFProtect
+from quart_wtf.utils import generate_csrf, validate_csrf
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+CONCURRENCY = (1, 10, 50)
+
+REPEAT = 3
+
+BODY_SIZES = {"small": 1024, "large": 256 * 1024}
+
+
+class Result(NamedTuple):
+    """
+    Result of a single benchmark scenario.
+    """
+    name: str
+    requests: int
+    rps: float
+    p50_ms: float
+    p99_ms: float
+    alloc_kb: float
+
+
+class Request(NamedTuple):
+    """
+    Arguments for a test client ``POST``.
+    """
+    data: bytes
+    headers: Dict[str, str]
+
+
+def create_app() -> Quart:
+    """
+    App protected by ``CSRFProtect`` with one form endpoint.
+    """
+    app = Quart(__name__)
+    app.secret_key = "benchmark-secret"
+    CSRFProtect(app)
+
+    @app.route("/token")
+    async def token() -> str:
+        return generate_csrf()
+
+    @app.route("/submit", methods=["POST"])
+    async def submit() -> str:
+        return "ok"
+
+    return app
+
+
+def build_request(kind: str, source: str, size: int, token: str) -> Request:
+    """
+    Build a request body of the given kind carrying the token in the
+    given source.
+    """
+    headers = {"X-CSRFToken": token} if source == "header" else {}
+    field = {"field": "csrf_token", "prefixed": "form-csrf_token"}.get(source)
+    fields: Dict[str, Any] = {field: token} if field else {}
+    fields["payload"] = "x" * size
+
+    if kind == "urlencoded":
+        data = "&".join(f"{key}={value}" for key, value in fields.items())
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+        return Request(data.encode(), headers)
+
+    if kind == "multipart":
+        payload = fields.pop("payload").encode()
+        fields["upload"] = FileStorage(BytesIO(payload), filename="a.bin")
+        boundary, data = encode_multipart(fields)
+        headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+        return Request(data, headers)
+
+    body = json.dumps({"payload": fields["payload"]})
+    headers["Content-Type"] = "application/json"
+    return Request(body.encode(), headers)
+
+
+async def measure(
+    name: str,
+    call: Callable[[], Awaitable[Any]],
+    requests: int,
+    concurrency: int
+) -> Result:
+    """
+    Run ``call`` ``requests`` times with at most ``concurrency`` calls in
+    flight, ``REPEAT`` times, and keep the fastest run. Then run a sample
+    under ``tracemalloc`` to measure allocations.
+    """
+    sample = max(1, requests // 10)
+    semaphore = asyncio.Semaphore(concurrency)
+    elapsed = float("inf")
+    latencies: List[float] = []
+
+    async def timed(run: List[float]) -> None:
+        async with semaphore:
+            start = perf_counter()
+            await call()
+            run.append(perf_counter() - start)
+
+    await asyncio.gather(*(call() for _ in range(sample)))  # warm up
+
+    for _ in range(REPEAT):
+        run: List[float] = []
+        start = perf_counter()
+        await asyncio.gather(*(timed(run) for _ in range(requests)))
+        run_time = perf_counter() - start
+
+        if run_time < elapsed:
+            elapsed, latencies = run_time, run
+
+    tracemalloc.start()
+    await asyncio.gather(*(call() for _ in range(sample)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cuts = quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return Result(
+        name=name,
+        requests=requests,
+        rps=requests / elapsed,
+        p50_ms=cuts[49] * 1000,
+        p99_ms=cuts[98] * 1000,
+        alloc_kb=peak / sample / 1024
+    )
+
+
+async def bench_utils(app: Quart, requests: int) -> List[Result]:
+    """
+    Benchmark ``generate_csrf`` and ``validate_csrf`` directly.
+    """
+    results = []
+
+    async with app.test_request_context("/"):
+        token = generate_csrf()
+
+        async def generate() -> None:
+            # Drop the token cached for the request, so each call signs
+            # the raw token again instead of reading it from ``g``.
+            g.pop("csrf_token", None)
+            generate_csrf()
+
+        async def validate() -> None:
+            validate_csrf(token)
+
+        results.append(await measure("generate_csrf", generate, requests, 1))
+        results.append(await measure("validate_csrf", validate, requests, 1))
+
+    return results
+
+
+async def bench_protect(app: Quart, requests: int) -> List[Result]:
+    """
+    Benchmark requests through the ``CSRFProtect`` before request hook.
+    """
+    client = app.test_client()
+    response = await client.get("/token")
+    token = await response.get_data(as_text=True)
+    scenarios = [
+        (kind, source)
+        for kind in ("urlencoded", "multipart")
+        for source in ("field", "prefixed", "header")
+    ] + [("json", "header")]
+    results = []
+
+    for kind, source in scenarios:
+        for size_name, size in BODY_SIZES.items():
+            req = build_request(kind, source, size, token)
+
+            async def post(req: Request = req) -> None:
+                response = await client.post(
+                    "/submit", data=req.data, headers=req.headers
+                )
+
+                if response.status_code != 200:
+                    raise RuntimeError(await response.get_data(as_text=True))
+
+            for concurrency in CONCURRENCY:
+                name = f"protect/{kind}/{source}/{size_name}/c{concurrency}"
+                results.append(
+                    await measure(name, post, requests, concurrency)
+                )
+
+    return results
+
+
+def report(results: List[Result], baseline: Dict[str, Any]) -> None:
+    """
+    Print the results table next to the baseline throughput.
+    """
+    print(
+        f"{'scenario':<44} {'req/s':>10} {'base':>10} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'KiB/req':>8}"
+    )
+
+    for result in results:
+        base = baseline.get(result.name, {}).get("rps")
+        base_text = f"{base:10.0f}" if base else f"{'-':>10}"
+        print(
+            f"{result.name:<44} {result.rps:10.0f} {base_text} "
+            f"{result.p50_ms:8.3f} {result.p99_ms:8.3f} "
+            f"{result.alloc_kb:8.1f}"
+        )
+
+
+async def run(requests: int) -> List[Result]:
+    """
+    Run all benchmarks.
+    """
+    app = create_app()
+    await app.startup()
+
+    try:
+        return [
+            *await bench_utils(app, requests * 10),
+            *await bench_protect(app, requests)
+        ]
+    finally:
+        await app.shutdown()
+
+
+def main() -> int:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description="Quart-WTF CSRF benchmarks")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    args = parser.parse_args()
+
+    requests = 50 if args.quick else args.requests
+    results = asyncio.run(run(requests))
+    baseline: Dict[str, Any] = {}
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+
+    report(results, baseline)
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": {
+                result.name: {
+                    key: round(value, 3) if isinstance(value, float) else value
+                    for key, value in result._asdict().items()
+                }
+                for result in results
+            }
+        }, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = [
+        result.name for result in results
+        if result.name in baseline
+        and result.rps < baseline[result.name]["rps"] * (1 - args.tolerance)
+    ]
+
+    for name in regressions:
+        print(f"REGRESSION: {name}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
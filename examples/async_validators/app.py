@@ -5,6 +5,7 @@ from wtforms.validators import DataRequired, EqualTo
 from wtforms.widgets import PasswordInput
 
 from quart_wtf import QuartForm
+from quart_wtf.cache import cached_validator
 
 # DATABASE SETUP
 async def db():
@@ -63,9 +64,12 @@ class CreateAccountForm(QuartForm):
 
     submit = SubmitField("Join Now")
 
+    @cached_validator(ttl=30, cache_passes=False)
     async def async_validate_username(self, username, user_table = get_repo):
         """
-        Custom async validation function.
+        Custom async validation function. Taken usernames are cached for
+        30 seconds, so resubmitting one skips the lookup. Free usernames
+        are always checked, since they can be taken at any time.
         """
         if await check_username_is_taken(user_table, username.data):
             raise ValidationError('Please use a different username.')
@@ -0,0 +1,186 @@
+"""
+quart_wtf.batch
+"""
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Sequence,
+    Set
+)
+
+from .const import BATCH_LIMIT_HELD, BATCH_RESULT_MISMATCH
+from .limits import acquire, held_resources
+
+BatchFunction = Callable[
+    [List[Any]], Awaitable[Mapping[Any, Any] | Sequence[Any]]
+]
+
+
+class BatchLoader:
+    """
+    Coalesces lookups made by async validators into batched calls. Keys
+    loaded within the same event loop iteration, or within ``delay``
+    seconds, are passed to ``batch_fn`` together, so fifty concurrent
+    signups make one query instead of fifty.
+    ::
+        async def load_users(usernames):
+            rows = await db.fetch_all(
+                "SELECT username FROM users WHERE username IN :names",
+                {"names": usernames}
+            )
+            return {row["username"]: row for row in rows}
+
+        users = BatchLoader(load_users)
+
+        class SignupForm(QuartForm):
+            async def async_validate_username(self, field):
+                if await users.load(field.data) is not None:
+                    raise ValidationError("Username taken.")
+
+    ``batch_fn`` receives a list of unique keys and returns either a
+    mapping of keys to values, where missing keys load as ``default``, or
+    a sequence of values in the same order as the keys. If it raises, every
+    key in the batch raises the same exception.
+
+    Identical keys share one lookup while it is pending or running. Results
+    are not kept once the batch finishes, combine the loader with
+    :func:`~quart_wtf.cache.cached_validator` to cache them.
+
+    Arguments:
+        batch_fn: Async function loading a list of keys.
+        max_batch_size: Most keys passed to one call. A full batch is sent
+            straight away. ``None`` means no limit.
+        delay: Seconds to wait for more keys before sending a batch. ``0``
+            waits for the current event loop iteration only.
+        default: Value of keys missing from a mapping result.
+        resource: Name of a concurrency limit, see
+            :func:`~quart_wtf.limits.set_concurrency_limit`, held while
+            ``batch_fn`` runs. It must not also limit the validators
+            calling :meth:`load`, they would hold every permit while the
+            batch waits for one. That is detected and raises
+            ``RuntimeError``. Limit either the validators or the loader.
+    """
+    def __init__(
+        self,
+        batch_fn: BatchFunction,
+        max_batch_size: int | None = None,
+        delay: float = 0,
+        default: Any = None,
+        resource: str | None = None
+    ) -> None:
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.delay = delay
+        self.default = default
+        self.resources = (resource,) if resource else ()
+        # Keys pending or being loaded, shared by every caller.
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        # Keys waiting for the next batch.
+        self._batch: Dict[Hashable, asyncio.Future] = {}
+        self._handle: asyncio.Handle | None = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Load one key, batched with the other keys loaded at the same time.
+        Raises ``RuntimeError`` if the caller holds the loader's resource.
+
+        Arguments:
+            key: The key to load.
+        """
+        for resource in self.resources:
+            if resource in held_resources():
+                raise RuntimeError(BATCH_LIMIT_HELD.format(resource))
+
+        future = self._futures.get(key)
+
+        if future is None:
+            future = self._enqueue(key)
+
+        # Shielded, so a cancelled caller does not cancel the lookup for
+        # the other callers waiting on the same key.
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        """
+        Load several keys, in one batch where possible.
+
+        Arguments:
+            keys: The keys to load.
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _enqueue(self, key: Hashable) -> asyncio.Future:
+        """
+        Add a key to the next batch, scheduling the batch if it is new.
+        """
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = self._batch[key] = loop.create_future()
+
+        if self.max_batch_size and len(self._batch) >= self.max_batch_size:
+            self._dispatch()
+        elif self._handle is None:
+            if self.delay:
+                self._handle = loop.call_later(self.delay, self._dispatch)
+            else:
+                self._handle = loop.call_soon(self._dispatch)
+
+        return future
+
+    def _dispatch(self) -> None:
+        """
+        Send the waiting keys as one batch.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        batch, self._batch = self._batch, {}
+
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        """
+        Call the batch function and resolve each key's future.
+        """
+        keys = list(batch)
+
+        try:
+            async with acquire(self.resources):
+                results = await self.batch_fn(keys)
+
+            if isinstance(results, Mapping):
+                values = [results.get(key, self.default) for key in keys]
+            else:
+                values = list(results)
+
+            if len(values) != len(keys):
+                raise ValueError(
+                    BATCH_RESULT_MISMATCH.format(len(values), len(keys))
+                )
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as error:  # pylint: disable=W0703
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for future, value in zip(batch.values(), values):
+                if not future.done():
+                    future.set_result(value)
+        finally:
+            for key, future in batch.items():
+                if self._futures.get(key) is future:
+                    del self._futures[key]
@@ -0,0 +1,192 @@
+"""
+quart_wtf.cache
+"""
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic
+from typing import Any, Callable, Hashable, Tuple
+
+from wtforms import Field, Form, ValidationError
+
+from .const import CONCURRENCY_LIMITS_ATTR
+from .limits import acquire, get_resources
+
+_Missing = object()
+
+
+class LRUCache:
+    """
+    Small in-process cache with least recently used eviction and an
+    optional time to live per entry.
+    ::
+        cache = LRUCache(maxsize=1024)
+        cache.set("key", "value", ttl=60)
+        cache.get("key")
+
+    Arguments:
+        maxsize: Maximum number of entries. The least recently used entry
+            is evicted when the cache is full. ``0`` disables the cache.
+    """
+    def __init__(self, maxsize: int = 128) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Tuple[Any, float | None]] = \
+            OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _Missing) is not _Missing
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value from the cache, or ``default`` if the key is missing
+        or has expired.
+
+        Arguments:
+            key: The cache key.
+            default: Returned if the key is not cached.
+        """
+        entry = self._data.get(key)
+
+        if entry is None:
+            return default
+
+        value, expires = entry
+
+        if expires is not None and expires <= monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Add a value to the cache.
+
+        Arguments:
+            key: The cache key.
+            value: The value to cache.
+            ttl: Seconds until the entry expires. ``None`` never expires.
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires = None if ttl is None else monotonic() + ttl
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a value from the cache and return it.
+
+        Arguments:
+            key: The cache key.
+            default: Returned if the key is not cached.
+        """
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        self._data.clear()
+
+
+def cached_validator(
+    ttl: float | None = 60,
+    maxsize: int = 1024,
+    key: Callable[[Form, Field], Hashable] | None = None,
+    cache_failures: bool = True,
+    failure_ttl: float | None = None,
+    cache_passes: bool = True
+) -> Callable[[Callable], Callable]:
+    """
+    Memoize an async validator by the field's value, so repeated values
+    such as retyped usernames and double submits skip the lookup.
+    ::
+        class SignupForm(QuartForm):
+            @cached_validator(ttl=30)
+            async def async_validate_username(self, field):
+                if await username_taken(field.data):
+                    raise ValidationError("Username taken.")
+
+        # After creating the user:
+        SignupForm.async_validate_username.invalidate("new_user")
+
+    Both passes and validation errors are cached, other exceptions are not.
+    A cached pass goes stale once the value is taken, so either call
+    ``invalidate`` where the value is stored or set ``cache_passes=False``.
+    The cache is shared by every form using the validator, so use ``key``
+    when the result depends on more than the field's value. Values that
+    are not hashable are never cached.
+
+    Place it above :func:`~quart_wtf.limits.concurrency_limit`, so cached
+    results are returned without waiting for the limit.
+
+    The decorated validator has ``invalidate(value, extra=None)`` to drop
+    one value, where ``extra`` is the result of ``key``, and
+    ``cache_clear()`` to drop all of them.
+
+    Arguments:
+        ttl: Seconds a result is cached for. ``None`` never expires.
+        maxsize: Maximum number of cached values. The least recently used
+            value is evicted when the cache is full.
+        key: Called with the form and field, returns extra data the result
+            depends on, such as the current user's id.
+        cache_failures: Cache validation errors as well as passes.
+        cache_passes: Cache passes as well as validation errors.
+        failure_ttl: Seconds a validation error is cached for. Defaults to
+            ``ttl``.
+    """
+    if failure_ttl is None:
+        failure_ttl = ttl
+
+    def decorator(func: Callable) -> Callable:
+        cache = LRUCache(maxsize=maxsize)
+        resources = get_resources(func)
+
+        @wraps(func)
+        async def wrapper(form: Form, field: Field) -> None:
+            cache_key = (field.data, key(form, field) if key else None)
+
+            try:
+                result = cache.get(cache_key, _Missing)
+            except TypeError:  # Unhashable value.
+                cache_key, result = None, _Missing
+
+            if result is _Missing:
+                try:
+                    async with acquire(resources):
+                        await func(form, field)
+                except ValidationError as error:
+                    result = (type(error), error.args)
+
+                    if cache_key is not None and cache_failures:
+                        cache.set(cache_key, result, ttl=failure_ttl)
+                else:
+                    result = None
+
+                    if cache_key is not None and cache_passes:
+                        cache.set(cache_key, result, ttl=ttl)
+
+            if result is not None:
+                error_class, args = result
+                raise error_class(*args)
+
+        def invalidate(value: Any, extra: Hashable = None) -> None:
+            cache.pop((value, extra))
+
+        # Limits are acquired by the wrapper on a cache miss instead.
+        setattr(wrapper, CONCURRENCY_LIMITS_ATTR, ())
+        wrapper.cache = cache  # type: ignore
+        wrapper.invalidate = invalidate  # type: ignore
+        wrapper.cache_clear = cache.clear  # type: ignore
+        return wrapper
+
+    return decorator
@@ -15,20 +15,122 @@ DEFAULT_CSRF_HEADERS = ['X-CSRFToken', 'X-CSRF-Token']
 
 DEFAULT_CSRF_SSL_STRICT = True
 
+DEFAULT_CSRF_LOOKUP_ORDER = ["headers", "form", "json"]
+
+DEFAULT_CSRF_JSON_KEY = None
+
+DEFAULT_CSRF_VERIFY_CACHE_SIZE = 0
+
+DEFAULT_CSRF_TOKEN_FORMAT = "itsdangerous"
+
+DEFAULT_CSRF_TRUSTED_ORIGINS = ()
+
+DEFAULT_CSRF_TOKEN_STORE = None
+
+DEFAULT_CSRF_STORE_TTL = None
+
+DEFAULT_CSRF_ONE_TIME = False
+
+DEFAULT_CSRF_ONE_TIME_MAX_BYTES = 4 * 1024 * 1024
+
+DEFAULT_CSRF_ONE_TIME_ERROR_RATE = 0.001
+
+DEFAULT_CSRF_SHARED_CACHE = None
+
+DEFAULT_CSRF_TOKEN_REUSE = 0
+
+DEFAULT_CSRF_WEBSOCKET = False
+
+DEFAULT_CSRF_WEBSOCKET_SUBPROTOCOL = "csrf."
+
 DEFAULT_SUBMIT_METHODS = ["POST", "PUT", "PATCH", "DELETE"]
 
+DEFAULT_CSRF_MODE = "session"
+
+DEFAULT_CSRF_COOKIE_NAME = None
+
+DEFAULT_CSRF_COOKIE_SECURE = False
+
+DEFAULT_CSRF_COOKIE_SAMESITE = "Lax"
+
+CSRF_MODE_COOKIE = "cookie"
+
+CSRF_MODE_SESSION = "session"
+
+CSRF_MODE_STORE = "store"
+
+CSRF_TOKEN_FORMAT_COMPACT = "compact"
+
+CSRF_TOKEN_SALT = "wtf-csrf-token"
+
+COMPACT_TOKEN_PREFIX = "v1."
+
+COMPACT_TOKEN_MAC_SIZE = 16
+
+ONE_TIME_NONCE_SIZE = 8
+
+REPLAY_FILTER_BUCKETS = 4
+
+SIGNED_TOKEN_CACHE_SIZE = 4096
+
+SHARED_CACHE_MAGIC = b"WTFCSRF2"
+
+SHARED_CACHE_PROBES = 16
+
+SHARED_CACHE_SIZE = 65536
+
+KEY_ID_SEPARATOR = "~"
+
+CSRF_COOKIE_SALT = "wtf-csrf-cookie"
+
+SERIALIZER_CACHE_SIZE = 32
+
+BATCH_LIMIT_HELD = "The caller already holds the batch resource {!r}."
+
+BATCH_RESULT_MISMATCH = "The batch function returned {} values for {} keys."
+
+COOKIE_TOKEN_MISSING = "The CSRF cookie token is missing."
+
 CSRF_NOT_CONFIGURED = "CSRF is not configured.CSRF is not configured."
 
 FIELD_NAME_REQUIRED = "A field name is required to used CSRF."
 
+KEY_ID_COLLISION = "Two CSRF secret keys share the same key id."
+
+LIMIT_NOT_SET = "No concurrency limit is set for the resource {!r}."
+
+LOOKUP_SOURCE_UNKNOWN = "Unknown CSRF token lookup source: {}."
+
+ONE_TIME_TIME_LIMIT = "One-time CSRF tokens require a time limit."
+
+ORIGIN_CACHE_SIZE = 256
+
+ORIGIN_HOST = "The origin does not match the host."
+
 REFERRER_HEADER = "The referrer header is missing."
 
 REFERRER_HOST = "The referrer does not match the host."
 
+REPLAY_FILTER_FULL = "The one-time token replay filter is full."
+
 SECRET_KEY_REQUIRED = "A secret key is required to use CSRF."
 
 SESSION_TOKEN_MISSING = "The CSRF session token is missing."
 
+SHARED_CACHE_FULL = "{} has no free slot for a pinned entry."
+
+SHARED_CACHE_MISMATCH = "{} is not a shared cache with the same size."
+
+STORE_NOT_LOADED = "The CSRF token store was not loaded for this request."
+
+STORE_REQUIRED = "A token store is required to use the CSRF store mode."
+
+ASYNC_VALIDATOR_PREFIXES = ("async_validate_", "async_validator_")
+
+ASYNC_VALIDATOR_TIMEOUT = "The validation timed out."
+
+CONCURRENCY_LIMITS_ATTR = "__concurrency_limits__"
+
 SUBMIT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
 
 TOKEN_EXPIRED = "The CSRF token has expired."
@@ -39,4 +141,10 @@ TOKEN_MISSING = "The CSRF token is missing."
 
 TOKEN_NO_MATCH = "The CSRF tokens do not match."
 
+TOKEN_NOT_ONE_TIME = "The CSRF token is not a one-time token."
+
+TOKEN_NOT_RECORDED = "The CSRF token could not be recorded as used."
+
+TOKEN_USED = "The CSRF token has already been used."
+
 VALIDATION_FAILED = "CSRF validation failed."
@@ -1,14 +1,17 @@
 """
 quart_wtf.csrf
 """
-from typing import Any, List
+from time import perf_counter
+from typing import Any, FrozenSet, Set, Tuple
+from weakref import WeakKeyDictionary
 
 from quart import (
     Quart,
     Blueprint,
     current_app,
     g,
-    request
+    request,
+    websocket
 )
 
 from werkzeug.exceptions import BadRequest
@@ -17,18 +20,49 @@ from wtforms import ValidationError
 from .const import (
     DEFAULT_ENABLED,
     DEFAULT_CHECK_DEFAULT,
+    DEFAULT_CSRF_COOKIE_NAME,
+    DEFAULT_CSRF_COOKIE_SAMESITE,
+    DEFAULT_CSRF_COOKIE_SECURE,
     DEFAULT_CSRF_FIELD_NAME,
     DEFAULT_CSRF_HEADERS,
+    DEFAULT_CSRF_JSON_KEY,
+    DEFAULT_CSRF_LOOKUP_ORDER,
+    DEFAULT_CSRF_MODE,
+    DEFAULT_CSRF_ONE_TIME,
+    DEFAULT_CSRF_ONE_TIME_ERROR_RATE,
+    DEFAULT_CSRF_ONE_TIME_MAX_BYTES,
     DEFAULT_CSRF_TIME_LIMIT,
+    DEFAULT_CSRF_SHARED_CACHE,
     DEFAULT_CSRF_SSL_STRICT,
+    DEFAULT_CSRF_STORE_TTL,
+    DEFAULT_CSRF_TOKEN_FORMAT,
+    DEFAULT_CSRF_TOKEN_REUSE,
+    DEFAULT_CSRF_TOKEN_STORE,
+    DEFAULT_CSRF_TRUSTED_ORIGINS,
+    DEFAULT_CSRF_VERIFY_CACHE_SIZE,
+    DEFAULT_CSRF_WEBSOCKET,
+    DEFAULT_CSRF_WEBSOCKET_SUBPROTOCOL,
     DEFAULT_SUBMIT_METHODS,
+    LOOKUP_SOURCE_UNKNOWN,
+    ORIGIN_HOST,
     REFERRER_HEADER,
     REFERRER_HOST,
+    TOKEN_NO_MATCH,
     VALIDATION_FAILED
 )
 
+from .metrics import CSRFMetrics
+from .origin import normalize_origin
+from .settings import CSRFSettings, get_csrf_settings
+from .stream import stream_csrf_token
 from .typing import ViewsType
-from .utils import logger, generate_csrf, validate_csrf, same_orgin
+from .utils import (
+    logger,
+    load_csrf_token,
+    render_csrf,
+    save_csrf_cookie,
+    validate_csrf
+)
 
 
 class CSRFProtect:
@@ -51,8 +85,12 @@ class CSRFProtect:
         Arguments:
             app: The `Quart` application.
         """
-        self._exempt_views: List = list()
-        self._exempt_blueprints: List = list()
+        self._exempt_views: Set[str] = set()
+        self._exempt_blueprints: Set[str] = set()
+        self._exempt_index: WeakKeyDictionary[
+            Quart, Tuple[int, Set[str]]
+        ] = WeakKeyDictionary()
+        self.metrics = CSRFMetrics()
 
         if app is not None:
             self.init_app(app)
@@ -70,44 +108,193 @@ class CSRFProtect:
         app.config.setdefault("WTF_CSRF_METHODS", DEFAULT_SUBMIT_METHODS)
         app.config.setdefault("WTF_CSRF_FIELD_NAME", DEFAULT_CSRF_FIELD_NAME)
         app.config.setdefault("WTF_CSRF_HEADERS", DEFAULT_CSRF_HEADERS)
+        app.config.setdefault("WTF_CSRF_JSON_KEY", DEFAULT_CSRF_JSON_KEY)
+        app.config.setdefault(
+            "WTF_CSRF_LOOKUP_ORDER", DEFAULT_CSRF_LOOKUP_ORDER
+        )
         app.config.setdefault("WTF_CSRF_TIME_LIMIT", DEFAULT_CSRF_TIME_LIMIT)
         app.config.setdefault("WTF_CSRF_SSL_STRICT", DEFAULT_CSRF_SSL_STRICT)
+        app.config.setdefault(
+            "WTF_CSRF_VERIFY_CACHE_SIZE", DEFAULT_CSRF_VERIFY_CACHE_SIZE
+        )
+        app.config.setdefault(
+            "WTF_CSRF_TOKEN_FORMAT", DEFAULT_CSRF_TOKEN_FORMAT
+        )
+        app.config.setdefault(
+            "WTF_CSRF_TRUSTED_ORIGINS", DEFAULT_CSRF_TRUSTED_ORIGINS
+        )
+        app.config.setdefault("WTF_CSRF_MODE", DEFAULT_CSRF_MODE)
+        app.config.setdefault("WTF_CSRF_COOKIE_NAME", DEFAULT_CSRF_COOKIE_NAME)
+        app.config.setdefault(
+            "WTF_CSRF_COOKIE_SECURE", DEFAULT_CSRF_COOKIE_SECURE
+        )
+        app.config.setdefault(
+            "WTF_CSRF_COOKIE_SAMESITE", DEFAULT_CSRF_COOKIE_SAMESITE
+        )
+        app.config.setdefault("WTF_CSRF_TOKEN_STORE", DEFAULT_CSRF_TOKEN_STORE)
+        app.config.setdefault("WTF_CSRF_STORE_TTL", DEFAULT_CSRF_STORE_TTL)
+        app.config.setdefault("WTF_CSRF_ONE_TIME", DEFAULT_CSRF_ONE_TIME)
+        app.config.setdefault(
+            "WTF_CSRF_ONE_TIME_MAX_BYTES", DEFAULT_CSRF_ONE_TIME_MAX_BYTES
+        )
+        app.config.setdefault(
+            "WTF_CSRF_ONE_TIME_ERROR_RATE", DEFAULT_CSRF_ONE_TIME_ERROR_RATE
+        )
+        app.config.setdefault(
+            "WTF_CSRF_SHARED_CACHE", DEFAULT_CSRF_SHARED_CACHE
+        )
+        app.config.setdefault("WTF_CSRF_TOKEN_REUSE", DEFAULT_CSRF_TOKEN_REUSE)
+        app.config.setdefault("WTF_CSRF_WEBSOCKET", DEFAULT_CSRF_WEBSOCKET)
+        app.config.setdefault(
+            "WTF_CSRF_WEBSOCKET_SUBPROTOCOL",
+            DEFAULT_CSRF_WEBSOCKET_SUBPROTOCOL
+        )
 
         app.extensions["csrf"] = self
+        self.reload_config(app)
+
+        app.jinja_env.globals["csrf_token"] = render_csrf
+        app.context_processor(lambda: {"crsf_token": render_csrf})
+        app.after_request(save_csrf_cookie)
 
-        app.jinja_env.globals["csrf_token"] = generate_csrf
-        app.context_processor(lambda: {"crsf_token": generate_csrf})
+        @app.before_serving
+        async def csrf_reload_config() -> None:
+            self.reload_config(app)
 
         @app.before_request
         async def csrf_protect() -> None:
-            if not app.config["WTF_CSRF_ENABLED"]:
+            settings = app.extensions["csrf_settings"]
+
+            if not settings.enabled:
                 return
 
-            if not app.config["WTF_CSRF_CHECK_DEFAULT"]:
+            if not settings.check_default:
                 return
 
-            if request.method not in app.config["WTF_CSRF_METHODS"]:
+            if request.method not in settings.methods:
                 return
 
             if not request.endpoint:
                 return
 
-            if request.blueprint in self._exempt_blueprints:
+            if request.endpoint in self._exempt_endpoints(app):
                 return
 
-            view = app.view_functions.get(request.endpoint)
+            await self.protect()
+
+        @app.before_websocket
+        async def csrf_protect_websocket() -> None:
+            settings = app.extensions["csrf_settings"]
+
+            if not settings.enabled or not settings.websocket:
+                return
+
+            if not settings.check_default:
+                return
+
+            if not websocket.endpoint:
+                return
+
+            if websocket.endpoint in self._exempt_endpoints(app):
+                return
+
+            await self.protect_websocket()
+
+    def reload_config(self, app: Quart | None = None) -> None:
+        """
+        Recompile the CSRF settings from the app's config. The settings are
+        compiled by :meth:`init_app` and again when the app starts serving,
+        call this after changing any ``WTF_CSRF_*`` config at runtime.
+
+        Arguments:
+            app: The `Quart` application. Defaults to ``current_app``.
+        """
+        if app is None:
+            app = current_app._get_current_object()  # type: ignore
+
+        app.extensions["csrf_settings"] = CSRFSettings.from_app(app)
+
+    def _exempt_endpoints(self, app: Quart) -> Set[str]:
+        """
+        Get the endpoints exempt from CSRF protection for the app. The set
+        is built lazily and rebuilt when routes are added or another view
+        or blueprint is exempted.
+
+        Arguments:
+            app: The `Quart` application.
+        """
+        index = self._exempt_index.get(app)
+        view_count = len(app.view_functions)
+
+        if index is not None and index[0] == view_count:
+            return index[1]
+
+        endpoints = set()
+
+        for endpoint, view in app.view_functions.items():
+            blueprint = endpoint.rpartition(".")[0]
+
+            if blueprint in self._exempt_blueprints:
+                endpoints.add(endpoint)
+                continue
+
             dest = f"{view.__module__}.{view.__name__}"
 
             if dest in self._exempt_views:
-                return
+                endpoints.add(endpoint)
 
-            await self.protect()
+        self._exempt_index[app] = (view_count, endpoints)
+        return endpoints
 
     async def _get_csrf_token(self) -> Any | None:
         """
-        Get the CSRF token.
+        Get the CSRF token. Sources are tried in the order given by
+        ``WTF_CSRF_LOOKUP_ORDER``, so with the default order the request
+        body is only parsed when no header carries a token.
+        """
+        settings = get_csrf_settings()
+
+        for source in settings.lookup_order:
+            if source == "headers":
+                csrf_token = self._get_header_token()
+            elif source == "form":
+                csrf_token = await self._get_form_token()
+            elif source == "json":
+                csrf_token = await self._get_json_token()
+            elif source == "stream":
+                csrf_token = await stream_csrf_token(
+                    request, settings.field_name
+                )
+            else:
+                raise RuntimeError(LOOKUP_SOURCE_UNKNOWN.format(source))
+
+            if csrf_token:
+                self.metrics.incr(f"source:{source}")
+                return csrf_token
+
+        self.metrics.incr("source:none")
+        return None
+
+    def _get_header_token(self) -> Any | None:
+        """
+        Get the CSRF token from the request headers.
+        """
+        for header_name in get_csrf_settings().headers:
+            csrf_token = request.headers.get(header_name)
+
+            if csrf_token:
+                return csrf_token
+
+        return None
+
+    async def _get_form_token(self) -> Any | None:
         """
-        field_name = current_app.config["WTF_CSRF_FIELD_NAME"]
+        Get the CSRF token from the submitted form data.
+        """
+        if request.is_json:
+            return None  # JSON bodies never hold form data.
+
+        field_name = get_csrf_settings().field_name
         form = await request.form
         base_token = form.get(field_name)
 
@@ -122,44 +309,161 @@ class CSRFProtect:
                 if csrf_token:
                     return csrf_token
 
-        # find the token in the request headers
-        for header_name in current_app.config["WTF_CSRF_HEADERS"]:
-            csrf_token = request.headers.get(header_name)
+        return None
 
-            if csrf_token:
-                return csrf_token
+    async def _get_json_token(self) -> Any | None:
+        """
+        Get the CSRF token from the ``WTF_CSRF_JSON_KEY`` key of a JSON
+        request body. The body is parsed with the request's JSON cache, so
+        :meth:`~quart_wtf.QuartForm.create_form` reuses the parsed data.
+        """
+        if not request.is_json:
+            return None
 
-        return None
+        try:
+            data = await request.get_json()
+        except BadRequest:
+            return None
+
+        if not isinstance(data, dict):
+            return None
+
+        settings = get_csrf_settings()
+        csrf_token = data.get(settings.json_key or settings.field_name)
+        return csrf_token if isinstance(csrf_token, str) else None
 
     def _error_response(self, reason: str) -> None:
         """
         Raises as a `CSRFError` with a specific reason.
         """
+        self.metrics.incr(f"failure:{reason}")
         raise CSRFError(reason)
 
     async def protect(self) -> None:
         """
         Provides the CSRF protection for the app.
         """
-        if request.method not in current_app.config["WTF_CSRF_METHODS"]:
+        settings = get_csrf_settings()
+
+        if request.method not in settings.methods:
             return
 
+        # Only requests that are checked read the token store.
+        await load_csrf_token()
+        self.metrics.incr("checked")
+        start = perf_counter()
+        csrf_token = await self._get_csrf_token()
+        self.metrics.observe("parse_time", perf_counter() - start)
+        self._verify_token(csrf_token, settings, request.endpoint)
+
+        if request.is_secure and settings.ssl_strict:
+            self._check_origin(settings.trusted_origins)
+
+        self.metrics.incr("passed")
+        g.csrf_valid = True  # Mark this request as CSRF valid.
+
+    async def protect_websocket(self) -> None:
+        """
+        Provides the CSRF protection for a websocket handshake. Runs before
+        the websocket is accepted, so a bad token rejects the handshake.
+        """
+        settings = get_csrf_settings()
+
+        await load_csrf_token()
+        self.metrics.incr("checked")
+        start = perf_counter()
+        csrf_token = self._get_websocket_token(settings)
+        self.metrics.observe("parse_time", perf_counter() - start)
+        self._verify_token(csrf_token, settings, websocket.endpoint)
+
+        self.metrics.incr("passed")
+        g.csrf_valid = True  # Mark this websocket as CSRF valid.
+
+    def _get_websocket_token(self, settings: CSRFSettings) -> Any | None:
+        """
+        Get the CSRF token from the websocket handshake. Browsers cannot set
+        headers on websockets, so the token can also be sent as a
+        subprotocol named ``WTF_CSRF_WEBSOCKET_SUBPROTOCOL`` followed by the
+        token, or as a query parameter named ``WTF_CSRF_FIELD_NAME``.
+
+        Arguments:
+            settings: The CSRF settings.
+        """
+        for header_name in settings.headers:
+            csrf_token = websocket.headers.get(header_name)
+
+            if csrf_token:
+                self.metrics.incr("source:headers")
+                return csrf_token
+
+        prefix = settings.websocket_subprotocol
+
+        for protocol in websocket.requested_subprotocols:
+            if protocol.startswith(prefix) and len(protocol) > len(prefix):
+                self.metrics.incr("source:subprotocol")
+                return protocol[len(prefix):]
+
+        csrf_token = websocket.args.get(settings.field_name)
+
+        if csrf_token:
+            self.metrics.incr("source:query")
+            return csrf_token
+
+        self.metrics.incr("source:none")
+        return None
+
+    def _verify_token(
+        self, csrf_token: Any, settings: CSRFSettings, endpoint: str | None
+    ) -> None:
+        """
+        Validate the token, recording the time taken. A token that does not
+        match is tried again as a token scoped to the endpoint, see
+        ``csrf_scope`` in :class:`~quart_wtf.meta.QuartFormMeta`.
+        """
+        start = perf_counter()
+
         try:
-            validate_csrf(await self._get_csrf_token())
+            try:
+                validate_csrf(csrf_token, one_time=settings.one_time)
+            except ValidationError as error:
+                if error.args[0] != TOKEN_NO_MATCH or not endpoint:
+                    raise
+
+                validate_csrf(
+                    csrf_token, one_time=settings.one_time, scope=endpoint
+                )
         except ValidationError as error:
             logger.info(error.args[0])
             self._error_response(error.args[0])
+        finally:
+            self.metrics.observe("verify_time", perf_counter() - start)
+
+    def _check_origin(self, trusted_origins: FrozenSet[str]) -> None:
+        """
+        Enforce the same origin policy. The ``Origin`` header is checked
+        first and the ``Referer`` header only if there is no origin. Both
+        must match the host or one of ``WTF_CSRF_TRUSTED_ORIGINS``.
+
+        Arguments:
+            trusted_origins: Normalized trusted origins.
+        """
+        good_origin = normalize_origin(f"https://{request.host}")
+        origin = request.headers.get("Origin")
+
+        if origin and origin != "null":
+            origin = normalize_origin(origin)
 
-        if request.is_secure and current_app.config["WTF_CSRF_SSL_STRICT"]:
-            if not request.referrer:
-                self._error_response(REFERRER_HEADER)
+            if origin != good_origin and origin not in trusted_origins:
+                self._error_response(ORIGIN_HOST)
+            return
 
-            good_referrer = f"https://{request.host}"
+        if not request.referrer:
+            self._error_response(REFERRER_HEADER)
 
-            if not same_orgin(request.referrer, good_referrer):
-                self._error_response(REFERRER_HOST)
+        origin = normalize_origin(request.referrer)
 
-        g.csrf_valid = True  # Mark this request as CSRF valid.
+        if origin != good_origin and origin not in trusted_origins:
+            self._error_response(REFERRER_HOST)
 
     def exempt(self, view: ViewsType) -> ViewsType:
         """
@@ -176,8 +480,10 @@ class CSRFProtect:
         Argument:
             view: The view function or a `quart.Blueprint` instance.
         """
+        self._exempt_index.clear()
+
         if isinstance(view, Blueprint):
-            self._exempt_blueprints.append(view.name)
+            self._exempt_blueprints.add(view.name)
             return view
 
         if isinstance(view, str):
@@ -185,7 +491,7 @@ class CSRFProtect:
         else:
             view_location = ".".join((view.__module__, view.__name__))
 
-        self._exempt_views.append(view_location)
+        self._exempt_views.add(view_location)
         return view
 
 
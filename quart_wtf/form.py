@@ -3,6 +3,7 @@ quart_wtf.form
 """
 from __future__ import annotations
 import asyncio
+from contextlib import AsyncExitStack
 from typing import Any, Callable, Dict, List
 
 from markupsafe import Markup
@@ -11,14 +12,44 @@ from werkzeug.datastructures import CombinedMultiDict, ImmutableMultiDict
 from wtforms import Form, Field, ValidationError
 from wtforms.widgets import HiddenInput
 
-from .const import SUBMIT_METHODS
+from .const import (
+    ASYNC_VALIDATOR_PREFIXES,
+    ASYNC_VALIDATOR_TIMEOUT,
+    SUBMIT_METHODS
+)
+from .limits import acquire, get_resources
 from .meta import QuartFormMeta
+from .utils import load_csrf_token
 from .typing import FormData
 
 
 _Auto = object()
 
 
+def _start_async_validator(form: QuartForm, field: Field) -> None:
+    """
+    Extra validator that starts the field's async validator once the rest
+    of its validation chain has passed. WTForms keeps running the chain
+    after a ``ValidationError``, so a field that already has errors is
+    skipped.
+    """
+    if not field.errors:
+        form._start_async(field)  # pylint: disable=W0212
+
+
+async def _cancel(tasks: List[asyncio.Future]) -> None:
+    """
+    Cancel the tasks that are still running and wait for them to finish.
+    """
+    pending = [task for task in tasks if not task.done()]
+
+    for task in pending:
+        task.cancel()
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
 class QuartForm(Form):
     """
     Quart specific subclass of WTForms :class:`~wtforms.form.Form`.
@@ -59,6 +90,20 @@ class QuartForm(Form):
     """
     Meta = QuartFormMeta
 
+    #: Async validators by field name, found when the class is created.
+    _async_validators: Dict[str, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        plan: Dict[str, Callable] = {}
+
+        for attr in dir(cls):
+            for prefix in ASYNC_VALIDATOR_PREFIXES:
+                if attr.startswith(prefix):
+                    plan.setdefault(attr[len(prefix):], getattr(cls, attr))
+
+        cls._async_validators = plan
+
     @classmethod
     async def create_form(
         cls,
@@ -114,22 +159,50 @@ class QuartForm(Form):
         """
         if cls.is_submitted():
             if formdata is _Auto:
-                files = await request.files
-                form = await request.form
-
-                if files:
-                    formdata = CombinedMultiDict((files, form))
-                elif form:
-                    formdata = form
-                elif request.is_json:
-                    json = await request.json
+                if request.is_json:
+                    # Uses the request's JSON cache, so a body already
+                    # parsed by CSRFProtect is not parsed again.
+                    json = await request.get_json()
                     formdata = ImmutableMultiDict(json)
                 else:
-                    formdata = None
+                    files = await request.files
+                    form = await request.form
+
+                    if files:
+                        formdata = CombinedMultiDict((files, form))
+                    elif form:
+                        formdata = form
+                    else:
+                        formdata = None
         else:
             formdata = None
 
-        return cls(formdata, obj, prefix, data, meta, **kwargs)
+        form = cls(formdata, obj, prefix, data, meta, **kwargs)
+        await form._load_csrf_token()
+        return form
+
+    async def _load_csrf_token(self) -> None:
+        """
+        Load the raw CSRF token when ``WTF_CSRF_MODE`` is ``"store"``.
+        """
+        if self.meta.csrf:
+            await load_csrf_token(
+                self.meta.csrf_secret, self.meta.csrf_field_name
+            )
+
+    async def _run_async(self, validator: Callable, field: Field) -> None:
+        """
+        Run an async validator once the form's cap and the validator's
+        concurrency limits allow it.
+        """
+        async with AsyncExitStack() as stack:
+            if self._async_limit is not None:
+                await stack.enter_async_context(self._async_limit)
+
+            await stack.enter_async_context(
+                acquire(get_resources(validator))
+            )
+            await validator(self, field)
 
     async def _validate_async(
             self, validator: Callable, field: Field
@@ -137,57 +210,124 @@ class QuartForm(Form):
         """
         Execute async validators.
         """
-        errors = list(field.errors)
+        timeout = self._async_timeout
 
         try:
-            await validator(self, field)
+            if timeout is None:
+                await self._run_async(validator, field)
+            else:
+                await asyncio.wait_for(
+                    self._run_async(validator, field), timeout
+                )
         except ValidationError as error:
-            errors.append(error.args[0])
-            field.errors = tuple(errors)
-            return False
-        return True
+            message = error.args[0]
+        except asyncio.TimeoutError:
+            message = field.gettext(ASYNC_VALIDATOR_TIMEOUT)
+        else:
+            return True
+
+        field.errors = (*field.errors, message)
+        return False
+
+    def _start_async(self, field: Field) -> None:
+        """
+        Schedule the field's async validator as a task.
+        """
+        validator = self._async_validators[field.short_name]
+        self._async_tasks.append(
+            asyncio.ensure_future(self._validate_async(validator, field))
+        )
+
+    async def _wait_async(
+            self, tasks: List[asyncio.Future], fail_fast: bool
+    ) -> bool:
+        """
+        Wait for the async validators. With ``fail_fast`` the remaining
+        validators are cancelled as soon as one fails. Validators still
+        running when this returns or raises are always cancelled.
+        """
+        try:
+            if not fail_fast:
+                return all(await asyncio.gather(*tasks))
+
+            for next_done in asyncio.as_completed(tasks):
+                if not await next_done:
+                    return False
+            return True
+        finally:
+            await _cancel(tasks)
 
     async def validate(
-            self, extra_validators: Dict[str, List[Callable]] = None
+            self,
+            extra_validators: Dict[str, List[Callable]] = None,
+            fail_fast: bool | None = None,
+            timeout: float | None = None
     ) -> bool:
         # pylint: disable=W0236
         """
         Async Overload :meth:`validate` to handle custom async validators.
 
+        The sync validators of every field run first. Each field whose
+        sync validators passed queues its async validator as a task, and the
+        queued tasks start together once sync validation finishes, so they
+        overlap with each other but not with the sync validators. With
+        ``fail_fast`` they are cancelled if sync validation failed, and the
+        rest are cancelled at the first async failure.
+        ``Meta.async_concurrency`` and
+        :func:`~quart_wtf.limits.concurrency_limit` bound how many run at
+        once.
+
         Arguments:
             extra_validators: Extra form validators.
+
+            fail_fast: Stop at the first error, cancelling any async
+            validators still running. Defaults to ``Meta.async_fail_fast``.
+
+            timeout: Seconds each async validator may run before it fails
+            with a timeout error. Defaults to ``Meta.async_timeout``.
         """
-        if extra_validators is not None:
-            extra = extra_validators.copy()
-        else:
-            extra = {}
+        await self._load_csrf_token()
+        plan = self._async_validators
 
-        async_validators = {}
-        completed = []
+        if not plan:
+            return super().validate(extra_validators=extra_validators)
 
-        def record_status(_, field):
-            completed.append(field.name)
+        if fail_fast is None:
+            fail_fast = self.meta.async_fail_fast
 
-        # Check for inline async validators
-        for name, field in self._fields.items():
-            func = getattr(self.__class__, f'async_validator_{name}', None)
-            if func:
-                async_validators[name] = (func, field)
-                extra.setdefault(name, []).append(record_status)
+        if timeout is None:
+            timeout = self.meta.async_timeout
 
-        # execute non-async validators
-        success = super().validate(extra_validators=extra_validators)
+        extra = dict(extra_validators or {})
+        concurrency = self.meta.async_concurrency
+        self._async_tasks: List[asyncio.Future] = []
+        self._async_timeout = timeout
+        self._async_limit = asyncio.Semaphore(concurrency) \
+            if concurrency else None
 
-        # execute async validators
-        if async_validators:
-            tasks = [self._validate_async(*async_validators[name]) for
-                     name in completed]
-            async_results = await asyncio.gather(*tasks)
+        for name in plan:
+            if name in self._fields:
+                extra[name] = [*extra.get(name, ()), _start_async_validator]
 
-            if False in async_results:
-                success = False
+        try:
+            # execute non-async validators
+            success = super().validate(extra_validators=extra)
+        except BaseException:
+            for task in self._async_tasks:
+                task.cancel()
+            raise
 
-        return success
+        tasks = self._async_tasks
+
+        if not tasks:
+            return success
+
+        if fail_fast and not success:
+            await _cancel(tasks)
+            return False
+
+        # execute async validators
+        return await self._wait_async(tasks, fail_fast) and success
 
     @staticmethod
     def is_submitted() -> bool:
@@ -0,0 +1,143 @@
+"""
+quart_wtf.limits
+"""
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Iterable, Tuple
+from weakref import WeakKeyDictionary
+
+from .const import CONCURRENCY_LIMITS_ATTR, LIMIT_NOT_SET
+
+# Limits by resource name, shared by every form in the process.
+_limits: Dict[str, int] = {}
+# Semaphores are bound to an event loop, so one set is kept per loop.
+_semaphores: WeakKeyDictionary = WeakKeyDictionary()
+# Resources held by the current task.
+_held: ContextVar[Tuple[str, ...]] = ContextVar(
+    "quart_wtf_held_limits", default=()
+)
+
+
+def set_concurrency_limit(resource: str, limit: int) -> None:
+    """
+    Set how many async validators using a resource may run at once in this
+    process. Validators that start while the limit is reached wait for a
+    running one to finish.
+    ::
+        set_concurrency_limit("database", 10)
+
+    Changing a limit applies to validators that start afterwards.
+
+    :param resource: Name of the resource.
+    :param limit: Number of validators that may run at once.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+
+    _limits[resource] = limit
+
+    for semaphores in _semaphores.values():
+        semaphores.pop(resource, None)
+
+
+def get_semaphore(resource: str) -> asyncio.Semaphore:
+    """
+    Get the semaphore enforcing a resource's limit in the running event
+    loop.
+
+    :param resource: Name of the resource.
+    """
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(resource)
+
+    if semaphore is None:
+        try:
+            limit = _limits[resource]
+        except KeyError:
+            raise RuntimeError(LIMIT_NOT_SET.format(resource)) from None
+
+        semaphore = semaphores[resource] = asyncio.Semaphore(limit)
+
+    return semaphore
+
+
+@asynccontextmanager
+async def acquire(resources: Iterable[str]) -> AsyncIterator[None]:
+    """
+    Hold the limits of several resources, waiting until each allows it.
+
+    :param resources: Names of the resources, in the order to acquire them.
+    """
+    resources = tuple(resources)
+
+    async with AsyncExitStack() as stack:
+        for resource in resources:
+            await stack.enter_async_context(get_semaphore(resource))
+
+        token = _held.set(_held.get() + resources)
+
+        try:
+            yield
+        finally:
+            _held.reset(token)
+
+
+def held_resources() -> Tuple[str, ...]:
+    """
+    Resources whose limits are held by the current task, such as the
+    limits of the async validator that is running.
+    """
+    return _held.get()
+
+
+def get_resources(validator: Callable) -> Tuple[str, ...]:
+    """
+    Resources an async validator is limited by, in the order they are
+    acquired.
+
+    :param validator: The async validator.
+    """
+    return getattr(validator, CONCURRENCY_LIMITS_ATTR, ())
+
+
+def concurrency_limit(
+    limit: int | None = None, resource: str | None = None
+) -> Callable[[Callable], Callable]:
+    """
+    Limit how many calls of an async validator run at once across the
+    process. With only ``limit`` the validator gets a limit of its own.
+    With ``resource`` it shares the named limit with every validator using
+    that resource, set here or with :func:`set_concurrency_limit`.
+    ::
+        class SignupForm(QuartForm):
+            @concurrency_limit(resource="database")
+            async def async_validate_username(self, field):
+                ...
+
+            @concurrency_limit(5)
+            async def async_validate_email(self, field):
+                ...
+
+    The decorator can be stacked to apply several limits. Waiting for a
+    limit counts towards the form's ``async_timeout``.
+
+    :param limit: Number of calls that may run at once.
+    :param resource: Name of a shared resource.
+    """
+    if limit is None and resource is None:
+        raise TypeError("concurrency_limit needs a limit or a resource.")
+
+    def decorator(func: Callable) -> Callable:
+        name = resource or f"{func.__module__}.{func.__qualname__}"
+
+        if limit is not None:
+            set_concurrency_limit(name, limit)
+
+        # Sorted, so validators with several limits always acquire them
+        # in the same order and cannot deadlock each other.
+        resources = sorted({*get_resources(func), name})
+        setattr(func, CONCURRENCY_LIMITS_ATTR, tuple(resources))
+        return func
+
+    return decorator
@@ -3,18 +3,13 @@ quart_wtf.meta
 """
 from typing import Any
 
-from quart import current_app, g, session
+from quart import current_app, g, request, session
 from werkzeug.utils import cached_property
-from wtforms import ValidationError
-from wtforms.csrf.core import CSRF
+from wtforms import HiddenField, ValidationError
+from wtforms.csrf.core import CSRF, CSRFTokenField
 from wtforms.meta import DefaultMeta
 
-from .const import (
-    DEFAULT_ENABLED,
-    DEFAULT_CSRF_FIELD_NAME,
-    DEFAULT_CSRF_TIME_LIMIT
-    )
-
+from .settings import CSRFSettings, get_csrf_settings
 from .utils import logger, generate_csrf, validate_csrf
 
 try:
@@ -23,7 +18,31 @@ except ImportError:
     translations = None  # quart_babel not installed.
 
 
+class _QuartCSRFTokenField(CSRFTokenField):
+    """
+    CSRF token field that only generates the token when it is first used,
+    so forms that are never rendered don't sign a token or touch the
+    session.
+    """
+    _current_token = None
+
+    @property  # type: ignore
+    def current_token(self):  # type: ignore
+        if self._current_token is None:
+            self._current_token = self.csrf_impl.generate_csrf_token(self)
+        return self._current_token
+
+    @current_token.setter
+    def current_token(self, value):  # type: ignore
+        self._current_token = value
+
+    def process(self, *args, **kwargs):  # type: ignore
+        # Skip CSRFTokenField.process, which generates the token eagerly.
+        HiddenField.process(self, *args, **kwargs)
+
+
 class _QuartFormCSRF(CSRF):
+    field_class = _QuartCSRFTokenField
     meta = None
 
     def setup_form(self, form):  # type: ignore
@@ -33,14 +52,30 @@ class _QuartFormCSRF(CSRF):
         self.meta = form.meta
         return super().setup_form(form)
 
+    def _get_scope(self) -> str | None:
+        """
+        Scope the form's token is bound to. ``True`` binds it to the
+        endpoint of the current request.
+        """
+        scope = self.meta.csrf_scope
+
+        if scope is True:
+            return request.endpoint
+        return scope or None
+
     def generate_csrf_token(self, csrf_token_field):  # type: ignore
         return generate_csrf(
             secret_key=self.meta.csrf_secret,
-            token_key=self.meta.csrf_field_name
+            token_key=self.meta.csrf_field_name,
+            one_time=self.meta.csrf_one_time,
+            scope=self._get_scope(),
+            time_limit=self.meta.csrf_time_limit
         )
 
     def validate_csrf_token(self, form, field):  # type: ignore
-        if g.get("csrf_valid", False):
+        if g.get("csrf_valid", False) and not (
+            self.meta.csrf_one_time or self.meta.csrf_scope
+        ):
             # Already protected by CSRF Protect.
             return
 
@@ -49,7 +84,9 @@ class _QuartFormCSRF(CSRF):
                 data=field.data,
                 secret_key=self.meta.csrf_secret,
                 time_limit=self.meta.csrf_time_limit,
-                token_key=self.meta.csrf_field_name
+                token_key=self.meta.csrf_field_name,
+                one_time=self.meta.csrf_one_time,
+                scope=self._get_scope()
             )
         except ValidationError as error:
             logger.info(error.args[0])
@@ -62,40 +99,59 @@ class QuartFormMeta(DefaultMeta):
     """
     csrf_class = _QuartFormCSRF
     csrf_context = session  # not used, provided for custom CSRF class.
+    #: Bind the CSRF token to an endpoint. ``True`` uses the endpoint the
+    #: form is rendered and submitted on.
+    csrf_scope: bool | str | None = None
+    #: Stop validation at the first error, cancelling async validators that
+    #: are still running.
+    async_fail_fast = False
+    #: Seconds each async validator may run. ``None`` means no limit.
+    async_timeout: float | None = None
+    #: Number of the form's async validators that may run at once. ``None``
+    #: means no limit.
+    async_concurrency: int | None = None
+
+    @cached_property
+    def _csrf_settings(self) -> CSRFSettings:
+        """
+        CSRF settings, looked up once per form.
+        """
+        return get_csrf_settings()
 
     @cached_property
     def csrf(self) -> bool:
         """
         CSRF Enabled.
         """
-        return current_app.config.get("WTF_CSRF_ENABLED", DEFAULT_ENABLED)
+        return self._csrf_settings.enabled
 
     @cached_property
     def csrf_secret(self) -> Any:
         """
         CSRF secret key.
         """
-        return current_app.config.get(
-            "WTF_CSRF_SECRET_KEY", current_app.secret_key
-            )
+        return self._csrf_settings.secret_key
 
     @cached_property
     def csrf_field_name(self) -> str:
         """
         CSRF field name.
         """
-        return current_app.config.get(
-            "WTF_CSRF_FIELD_NAME", DEFAULT_CSRF_FIELD_NAME
-            )
+        return self._csrf_settings.field_name
 
     @cached_property
     def csrf_time_limit(self) -> int:
         """
         CSRF time limit.
         """
-        return current_app.config.get(
-            "WTF_CSRF_TIME_LIMIT", DEFAULT_CSRF_TIME_LIMIT
-            )
+        return self._csrf_settings.time_limit
+
+    @cached_property
+    def csrf_one_time(self) -> bool:
+        """
+        CSRF one-time tokens.
+        """
+        return self._csrf_settings.one_time
 
     def get_translations(self, form):  # type: ignore
         """
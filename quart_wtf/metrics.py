@@ -0,0 +1,157 @@
+"""
+quart_wtf.metrics
+"""
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, List, Sequence
+
+MetricsCallback = Callable[[str, float], None]
+
+# Upper bounds in seconds, from 10 microseconds to 1 second.
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+
+class Histogram:
+    """
+    Fixed bucket histogram of durations in seconds.
+
+    Arguments:
+        buckets: Sorted upper bounds of the buckets. Values above the last
+            bound are counted in an overflow bucket.
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+
+        Arguments:
+            value: The value to record.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, percent: float) -> float:
+        """
+        Upper bound of the bucket holding the given percentile. Returns
+        ``inf`` if it falls in the overflow bucket and ``0.0`` if nothing
+        was recorded.
+
+        Arguments:
+            percent: Percentile between 0 and 100.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = self.count * percent / 100
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            seen += count
+
+            if count and seen >= rank:
+                break
+
+        if index < len(self.buckets):
+            return self.buckets[index]
+        return float("inf")
+
+
+class CSRFMetrics:
+    """
+    In-process counters and histograms for :class:`~quart_wtf.CSRFProtect`.
+    ::
+        csrf = CSRFProtect(app)
+        csrf.metrics.counters["checked"]
+        csrf.metrics.histograms["verify_time"].percentile(99)
+
+    Counters:
+        ``checked``: requests checked by :meth:`~quart_wtf.CSRFProtect.protect`.
+        ``passed``: requests that passed the check.
+        ``source:<name>``: where the token was found, one of the
+        ``WTF_CSRF_LOOKUP_ORDER`` sources or ``none``.
+        ``failure:<reason>``: failures by reason, using the messages in
+        :mod:`quart_wtf.const`.
+        ``one_time_overflow``: times a full bucket of the one-time token
+        replay filter started another filter, using memory set aside for
+        the other buckets of ``WTF_CSRF_ONE_TIME_MAX_BYTES``.
+
+    Histograms:
+        ``parse_time``: seconds spent finding the token in the request.
+        ``verify_time``: seconds spent verifying the token.
+
+    Use :meth:`connect` to forward every update to another metrics
+    system.
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self._callbacks: List[MetricsCallback] = []
+        self.counters: Counter[str] = Counter()
+        self.histograms: Dict[str, Histogram] = {}
+
+    def connect(self, callback: MetricsCallback) -> MetricsCallback:
+        """
+        Register a callback that receives ``(name, value)`` for every
+        counter increment and histogram observation. Can be used as a
+        decorator.
+
+        Arguments:
+            callback: The callback function.
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def disconnect(self, callback: MetricsCallback) -> None:
+        """
+        Remove a callback registered with :meth:`connect`.
+
+        Arguments:
+            callback: The callback function.
+        """
+        self._callbacks.remove(callback)
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """
+        Increment a counter.
+
+        Arguments:
+            name: The counter name.
+            value: The amount to add.
+        """
+        self.counters[name] += value
+
+        for callback in self._callbacks:
+            callback(name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a value in a histogram.
+
+        Arguments:
+            name: The histogram name.
+            value: The value to record, in seconds.
+        """
+        histogram = self.histograms.get(name)
+
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self._buckets)
+
+        histogram.observe(value)
+
+        for callback in self._callbacks:
+            callback(name, value)
+
+    def reset(self) -> None:
+        """
+        Clear all counters and histograms. Callbacks stay connected.
+        """
+        self.counters.clear()
+        self.histograms.clear()
@@ -0,0 +1,43 @@
+"""
+quart_wtf.origin
+"""
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from .const import ORIGIN_CACHE_SIZE
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@lru_cache(maxsize=ORIGIN_CACHE_SIZE)
+def normalize_origin(uri: str) -> str | None:
+    """
+    Reduce a URI, such as an ``Origin`` or ``Referer`` header, to its
+    normalized ``scheme://host[:port]`` origin. The scheme and host are
+    lowercased and default ports are dropped, so equal origins compare
+    equal as strings. Results are cached, since clients send the same
+    values over and over.
+
+    Returns ``None`` if the URI has no scheme or host.
+
+    :param uri: The URI to normalize.
+    """
+    try:
+        parts = urlsplit(uri.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+
+    if not scheme or not host:
+        return None
+
+    if ":" in host:
+        host = f"[{host}]"
+
+    if port is None or port == DEFAULT_PORTS.get(scheme):
+        return f"{scheme}://{host}"
+
+    return f"{scheme}://{host}:{port}"
@@ -0,0 +1,197 @@
+"""
+quart_wtf.replay
+"""
+import hashlib
+import math
+import os
+from time import time
+from typing import Callable, Dict, Iterator, List
+
+from .const import REPLAY_FILTER_FULL
+
+
+class BloomFilter:
+    """
+    Fixed size Bloom filter. Membership tests can return false positives
+    but never false negatives.
+
+    Arguments:
+        size: Size of the bit array in bytes.
+        hashes: Number of bit positions set per item.
+    """
+    def __init__(self, size: int, hashes: int) -> None:
+        self.bits = bytearray(max(1, size))
+        self.hashes = max(1, hashes)
+        self.count = 0
+        self._size = len(self.bits) * 8
+        self._key = os.urandom(16)
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def _positions(self, item: bytes) -> Iterator[int]:
+        """
+        Bit positions of an item, using double hashing over one keyed
+        blake2b digest.
+        """
+        digest = hashlib.blake2b(item, key=self._key, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for index in range(self.hashes):
+            yield (first + index * second) % self._size
+
+    def add(self, item: bytes) -> None:
+        """
+        Add an item to the filter.
+
+        Arguments:
+            item: The item to add.
+        """
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+
+class ReplayFilterFull(RuntimeError):
+    """
+    Raised when an item cannot be remembered without going over the replay
+    filter's ``max_bytes``.
+    """
+
+
+class ReplayFilter:
+    """
+    Remembers used one-time CSRF tokens. Items are added to a Bloom filter
+    for the current time bucket, and buckets are dropped once they are
+    older than ``window``.
+    ::
+        replay = ReplayFilter(window=3600, max_bytes=4 * 1024 * 1024)
+        replay.add(b"token")  # True
+        replay.add(b"token")  # False, already used
+
+    Set ``window`` to at least the token time limit, expired tokens are
+    rejected anyway so older buckets are not needed.
+
+    Each bucket's filter keeps false positives at ``error_rate`` up to
+    :attr:`capacity` items. When it is full another filter is started for
+    the bucket, rather than letting the false positive rate grow, and
+    ``on_overflow`` is called. Filters are only started while the total
+    stays within ``max_bytes``. Past that :meth:`add` raises
+    :class:`ReplayFilterFull`, so an item is never accepted without being
+    remembered.
+
+    Arguments:
+        window: Seconds an item is remembered for, at least.
+        max_bytes: Memory ceiling for all buckets together.
+        error_rate: False positive rate of each filter when it is full.
+        buckets: Number of buckets the window is split into.
+        on_overflow: Called when a full bucket starts another filter.
+    """
+    def __init__(
+        self,
+        window: int,
+        max_bytes: int,
+        error_rate: float,
+        buckets: int = 4,
+        on_overflow: Callable[[], None] | None = None
+    ) -> None:
+        self.window = window
+        self.max_bytes = max_bytes
+        self.error_rate = error_rate
+        self.buckets = buckets
+        self.bucket_width = window / buckets
+        # One extra bucket, so the oldest item in the window is covered
+        # while the current bucket fills.
+        self.bucket_size = max_bytes // (buckets + 1)
+        self.hashes = max(1, round(-math.log2(error_rate)))
+        self.on_overflow = on_overflow
+        self.overflows = 0
+        self._filters: Dict[int, List[BloomFilter]] = {}
+
+    def __contains__(self, item: bytes) -> bool:
+        self._expire(self._bucket())
+        return any(
+            item in bloom
+            for blooms in self._filters.values()
+            for bloom in blooms
+        )
+
+    def _bucket(self) -> int:
+        """
+        Index of the current time bucket.
+        """
+        return int(time() // self.bucket_width)
+
+    def _expire(self, bucket: int) -> None:
+        """
+        Drop the buckets that have left the window.
+        """
+        for index in [
+            index for index in self._filters if index < bucket - self.buckets
+        ]:
+            del self._filters[index]
+
+    @property
+    def capacity(self) -> int:
+        """
+        Number of items each filter holds at the configured error rate.
+        """
+        bits = self.bucket_size * 8
+        return int(bits * math.log(2) ** 2 / -math.log(self.error_rate))
+
+    def extend(self, window: int) -> None:
+        """
+        Remember items for at least ``window`` seconds. The window never
+        shrinks, and buckets are added so their width stays the same.
+
+        Arguments:
+            window: Seconds an item must be remembered for.
+        """
+        if window > self.window:
+            self.buckets = math.ceil(window / self.bucket_width)
+            self.window = window
+
+    def add(self, item: bytes) -> bool:
+        """
+        Add an item. Returns ``False`` if the item was already added within
+        the window, or is a false positive.
+
+        Arguments:
+            item: The item to add.
+
+        :raises ReplayFilterFull: if another filter is needed and would go
+            over ``max_bytes``.
+        """
+        if item in self:
+            return False
+
+        blooms = self._filters.setdefault(self._bucket(), [])
+
+        if not blooms or blooms[-1].count >= self.capacity:
+            count = sum(len(blooms) for blooms in self._filters.values())
+
+            if (count + 1) * self.bucket_size > self.max_bytes:
+                raise ReplayFilterFull(REPLAY_FILTER_FULL)
+
+            if blooms:
+                self.overflows += 1
+
+                if self.on_overflow is not None:
+                    self.on_overflow()
+
+            blooms.append(BloomFilter(self.bucket_size, self.hashes))
+
+        blooms[-1].add(item)
+        return True
+
+    def clear(self) -> None:
+        """
+        Forget all items.
+        """
+        self._filters.clear()
@@ -0,0 +1,170 @@
+"""
+quart_wtf.settings
+"""
+from typing import Any, FrozenSet, NamedTuple, Tuple
+
+from quart import Quart, current_app
+
+from .origin import normalize_origin
+
+from .const import (
+    DEFAULT_ENABLED,
+    DEFAULT_CHECK_DEFAULT,
+    DEFAULT_CSRF_COOKIE_NAME,
+    DEFAULT_CSRF_COOKIE_SAMESITE,
+    DEFAULT_CSRF_COOKIE_SECURE,
+    DEFAULT_CSRF_FIELD_NAME,
+    DEFAULT_CSRF_HEADERS,
+    DEFAULT_CSRF_JSON_KEY,
+    DEFAULT_CSRF_LOOKUP_ORDER,
+    DEFAULT_CSRF_MODE,
+    DEFAULT_CSRF_ONE_TIME,
+    DEFAULT_CSRF_ONE_TIME_ERROR_RATE,
+    DEFAULT_CSRF_ONE_TIME_MAX_BYTES,
+    DEFAULT_CSRF_SHARED_CACHE,
+    DEFAULT_CSRF_SSL_STRICT,
+    DEFAULT_CSRF_STORE_TTL,
+    DEFAULT_CSRF_TIME_LIMIT,
+    DEFAULT_CSRF_TOKEN_FORMAT,
+    DEFAULT_CSRF_TOKEN_REUSE,
+    DEFAULT_CSRF_TOKEN_STORE,
+    DEFAULT_CSRF_TRUSTED_ORIGINS,
+    DEFAULT_CSRF_VERIFY_CACHE_SIZE,
+    DEFAULT_CSRF_WEBSOCKET,
+    DEFAULT_CSRF_WEBSOCKET_SUBPROTOCOL,
+    DEFAULT_SUBMIT_METHODS
+)
+
+
+class CSRFSettings(NamedTuple):
+    """
+    Immutable snapshot of the ``WTF_CSRF_*`` configuration. The
+    :class:`~quart_wtf.CSRFProtect` extension compiles one when it is
+    initialized, so the request path reads attributes instead of looking
+    up ``current_app.config`` over and over.
+    """
+    enabled: bool
+    check_default: bool
+    secret_key: Any
+    field_name: str
+    time_limit: int | None
+    headers: Tuple[str, ...]
+    methods: FrozenSet[str]
+    ssl_strict: bool
+    mode: str
+    cookie_name: str | None
+    cookie_secure: bool
+    cookie_samesite: str | None
+    lookup_order: Tuple[str, ...]
+    verify_cache_size: int
+    token_format: str
+    trusted_origins: FrozenSet[str]
+    token_store: Any
+    store_ttl: int | None
+    one_time: bool
+    one_time_max_bytes: int
+    one_time_error_rate: float
+    shared_cache: Any
+    token_reuse: int
+    websocket: bool
+    websocket_subprotocol: str
+    json_key: str | None
+
+    @classmethod
+    def from_app(cls, app: Quart) -> "CSRFSettings":
+        """
+        Compile the settings from the app's config.
+
+        Arguments:
+            app: The `Quart` application.
+        """
+        config = app.config
+        secret_key = config.get("WTF_CSRF_SECRET_KEY", app.secret_key)
+
+        if isinstance(secret_key, list):
+            secret_key = tuple(secret_key)
+
+        return cls(
+            enabled=config.get("WTF_CSRF_ENABLED", DEFAULT_ENABLED),
+            check_default=config.get(
+                "WTF_CSRF_CHECK_DEFAULT", DEFAULT_CHECK_DEFAULT
+            ),
+            secret_key=secret_key,
+            field_name=config.get(
+                "WTF_CSRF_FIELD_NAME", DEFAULT_CSRF_FIELD_NAME
+            ),
+            time_limit=config.get(
+                "WTF_CSRF_TIME_LIMIT", DEFAULT_CSRF_TIME_LIMIT
+            ),
+            headers=tuple(
+                config.get("WTF_CSRF_HEADERS", DEFAULT_CSRF_HEADERS)
+            ),
+            methods=frozenset(
+                config.get("WTF_CSRF_METHODS", DEFAULT_SUBMIT_METHODS)
+            ),
+            ssl_strict=config.get(
+                "WTF_CSRF_SSL_STRICT", DEFAULT_CSRF_SSL_STRICT
+            ),
+            mode=config.get("WTF_CSRF_MODE", DEFAULT_CSRF_MODE),
+            cookie_name=config.get(
+                "WTF_CSRF_COOKIE_NAME", DEFAULT_CSRF_COOKIE_NAME
+            ),
+            cookie_secure=config.get(
+                "WTF_CSRF_COOKIE_SECURE", DEFAULT_CSRF_COOKIE_SECURE
+            ),
+            cookie_samesite=config.get(
+                "WTF_CSRF_COOKIE_SAMESITE", DEFAULT_CSRF_COOKIE_SAMESITE
+            ),
+            lookup_order=tuple(
+                config.get("WTF_CSRF_LOOKUP_ORDER", DEFAULT_CSRF_LOOKUP_ORDER)
+            ),
+            verify_cache_size=config.get(
+                "WTF_CSRF_VERIFY_CACHE_SIZE", DEFAULT_CSRF_VERIFY_CACHE_SIZE
+            ),
+            token_format=config.get(
+                "WTF_CSRF_TOKEN_FORMAT", DEFAULT_CSRF_TOKEN_FORMAT
+            ),
+            trusted_origins=frozenset(
+                filter(None, map(normalize_origin, config.get(
+                    "WTF_CSRF_TRUSTED_ORIGINS", DEFAULT_CSRF_TRUSTED_ORIGINS
+                )))
+            ),
+            token_store=config.get(
+                "WTF_CSRF_TOKEN_STORE", DEFAULT_CSRF_TOKEN_STORE
+            ),
+            store_ttl=config.get("WTF_CSRF_STORE_TTL", DEFAULT_CSRF_STORE_TTL),
+            one_time=config.get("WTF_CSRF_ONE_TIME", DEFAULT_CSRF_ONE_TIME),
+            one_time_max_bytes=config.get(
+                "WTF_CSRF_ONE_TIME_MAX_BYTES", DEFAULT_CSRF_ONE_TIME_MAX_BYTES
+            ),
+            one_time_error_rate=config.get(
+                "WTF_CSRF_ONE_TIME_ERROR_RATE",
+                DEFAULT_CSRF_ONE_TIME_ERROR_RATE
+            ),
+            shared_cache=config.get(
+                "WTF_CSRF_SHARED_CACHE", DEFAULT_CSRF_SHARED_CACHE
+            ),
+            token_reuse=config.get(
+                "WTF_CSRF_TOKEN_REUSE", DEFAULT_CSRF_TOKEN_REUSE
+            ),
+            websocket=config.get("WTF_CSRF_WEBSOCKET", DEFAULT_CSRF_WEBSOCKET),
+            websocket_subprotocol=config.get(
+                "WTF_CSRF_WEBSOCKET_SUBPROTOCOL",
+                DEFAULT_CSRF_WEBSOCKET_SUBPROTOCOL
+            ),
+            json_key=config.get("WTF_CSRF_JSON_KEY", DEFAULT_CSRF_JSON_KEY)
+        )
+
+
+def get_csrf_settings() -> CSRFSettings:
+    """
+    Get the CSRF settings for the current app. Uses the snapshot compiled
+    by :class:`~quart_wtf.CSRFProtect` if the extension is registered,
+    otherwise reads the current config.
+    """
+    settings = current_app.extensions.get("csrf_settings")
+
+    if settings is None:
+        settings = CSRFSettings.from_app(current_app)
+
+    return settings
@@ -0,0 +1,342 @@
+"""
+quart_wtf.shared
+"""
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from contextlib import contextmanager
+from time import time
+from typing import Any, Hashable, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore  # not available on Windows.
+
+from .const import (
+    SHARED_CACHE_FULL,
+    SHARED_CACHE_MAGIC,
+    SHARED_CACHE_MISMATCH,
+    SHARED_CACHE_PROBES,
+    SHARED_CACHE_SIZE
+)
+
+# Fingerprint, value, expiry time, flags, checksum.
+_SLOT = struct.Struct("<16sqdII")
+_PINNED = 1
+_HEADER = struct.Struct("<8sQ")
+_EMPTY = bytes(16)
+_Missing = object()
+
+
+class SharedCacheFull(RuntimeError):
+    """
+    Raised when a pinned entry cannot be stored because every slot it can
+    use holds a live pinned entry.
+    """
+
+
+class SharedCache:
+    """
+    Cache shared by every worker process on a node, stored in a memory
+    mapped file. Used for verified tokens and spent one-time tokens when
+    set as ``WTF_CSRF_SHARED_CACHE``.
+    ::
+        app.config["WTF_CSRF_SHARED_CACHE"] = SharedCache("/dev/shm/csrf")
+
+    The file holds a fixed size open addressing table, so memory use never
+    grows. Keys are stored as 16 byte fingerprints and values must be
+    integers. Writes take an exclusive file lock, reads take no lock and
+    treat a slot that is being written as a miss. Each process maps the file
+    the first time it uses the cache, so an instance created before the
+    server forks is safe to share.
+
+    When all slots a key can use are taken, the entry closest to expiring
+    is replaced. Pinned entries, used for spent one-time tokens, are never
+    replaced before they expire. If a pinned entry finds no free slot,
+    :class:`SharedCacheFull` is raised, and an entry that is not pinned is
+    dropped. Size the table for the number of tokens used within the token
+    time limit.
+
+    Arguments:
+        path: Path of the file. It is created if it does not exist.
+        slots: Number of slots, rounded up to a power of two. Each slot
+            uses 40 bytes.
+    """
+    def __init__(self, path: str, slots: int = SHARED_CACHE_SIZE) -> None:
+        self.path = path
+        self.slots = 1 << max(0, slots - 1).bit_length()
+        self.maxsize = self.slots
+        self._pid: int | None = None
+        self._fd = -1
+        self._map: mmap.mmap | None = None
+
+    def __len__(self) -> int:
+        now = time()
+        return sum(
+            1 for _, entry in self._scan(range(self.slots))
+            if entry is not None and not _expired(entry[2], now)
+        )
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _Missing) is not _Missing
+
+    def _open(self) -> mmap.mmap:
+        """
+        Map the file in this process, creating and sizing it if needed.
+        """
+        if self._map is not None and self._pid == os.getpid():
+            return self._map
+
+        size = _HEADER.size + self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        with _locked(fd):
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(SHARED_CACHE_MAGIC, self.slots), 0)
+
+            magic, slots = _HEADER.unpack(os.pread(fd, _HEADER.size, 0))
+
+        if magic != SHARED_CACHE_MAGIC or slots != self.slots or \
+                os.fstat(fd).st_size != size:
+            os.close(fd)
+            raise RuntimeError(SHARED_CACHE_MISMATCH.format(self.path))
+
+        self._fd, self._pid = fd, os.getpid()
+        self._map = mmap.mmap(fd, size)
+        return self._map
+
+    def _slots(self, fingerprint: bytes) -> range:
+        """
+        Slot indexes probed for a fingerprint.
+        """
+        start = int.from_bytes(fingerprint[:8], "little") & (self.slots - 1)
+        return range(start, start + SHARED_CACHE_PROBES)
+
+    def _scan(
+        self, indexes: range
+    ) -> Iterator[Tuple[int, Tuple[bytes, int, float, int] | None]]:
+        """
+        Read slots, yielding ``None`` for empty or torn slots.
+        """
+        data = self._open()
+
+        for index in indexes:
+            index &= self.slots - 1
+            offset = _HEADER.size + index * _SLOT.size
+            raw = data[offset:offset + _SLOT.size]
+            fingerprint, value, expires, flags, check = _SLOT.unpack(raw)
+
+            if fingerprint == _EMPTY or check != zlib.crc32(raw[:36]):
+                yield index, None
+            else:
+                yield index, (fingerprint, value, expires, flags)
+
+    def _find(
+        self, fingerprint: bytes, now: float
+    ) -> Tuple[int | None, int | None]:
+        """
+        Find the slot holding a live entry for the fingerprint, and the
+        best slot to write a new entry to. Live pinned entries are never
+        chosen, so the write slot is ``None`` if all of them are pinned.
+        """
+        victim, victim_expires = None, float("inf")
+
+        for index, entry in self._scan(self._slots(fingerprint)):
+            if entry is None or _expired(entry[2], now):
+                expires = -1.0
+            elif entry[0] == fingerprint:
+                return index, index
+            elif entry[3] & _PINNED:
+                continue
+            else:
+                expires = entry[2] or float("inf")
+
+            if victim is None or expires < victim_expires:
+                victim, victim_expires = index, expires
+
+        return None, victim
+
+    def _write(
+        self,
+        index: int,
+        fingerprint: bytes,
+        value: int,
+        expires: float,
+        flags: int = 0
+    ) -> None:
+        """
+        Write a slot. Must hold the file lock.
+        """
+        check = zlib.crc32(
+            _SLOT.pack(fingerprint, value, expires, flags, 0)[:36]
+        )
+        packed = _SLOT.pack(fingerprint, value, expires, flags, check)
+        offset = _HEADER.size + index * _SLOT.size
+        self._open()[offset:offset + _SLOT.size] = packed
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value from the cache, or ``default`` if the key is missing
+        or has expired.
+
+        Arguments:
+            key: The cache key.
+            default: Returned if the key is not cached.
+        """
+        fingerprint = _fingerprint(key)
+        now = time()
+
+        for _, entry in self._scan(self._slots(fingerprint)):
+            if entry is not None and entry[0] == fingerprint:
+                if not _expired(entry[2], now):
+                    return entry[1]
+
+        return default
+
+    def set(
+        self,
+        key: Hashable,
+        value: int,
+        ttl: float | None = None,
+        pin: bool = False
+    ) -> None:
+        """
+        Add a value to the cache.
+
+        Arguments:
+            key: The cache key.
+            value: The integer value to cache.
+            ttl: Seconds until the entry expires. ``None`` never expires.
+            pin: Never replace the entry with another before it expires.
+        """
+        self._store(key, value, ttl, replace=True, pin=pin)
+
+    def add(
+        self,
+        key: Hashable,
+        value: int,
+        ttl: float | None = None,
+        pin: bool = False
+    ) -> bool:
+        """
+        Add a value unless the key is already cached, as one atomic step
+        across all processes. Returns ``False`` if the key was cached.
+
+        Arguments:
+            key: The cache key.
+            value: The integer value to cache.
+            ttl: Seconds until the entry expires. ``None`` never expires.
+            pin: Never replace the entry with another before it expires.
+        """
+        return self._store(key, value, ttl, replace=False, pin=pin)
+
+    def _store(
+        self,
+        key: Hashable,
+        value: int,
+        ttl: float | None,
+        replace: bool,
+        pin: bool
+    ) -> bool:
+        """
+        Write an entry under the file lock.
+
+        :raises SharedCacheFull: if a pinned entry has no free slot.
+        """
+        fingerprint = _fingerprint(key)
+        self._open()
+
+        with _locked(self._fd):
+            now = time()
+            found, index = self._find(fingerprint, now)
+
+            if found is not None and not replace:
+                return False
+
+            if index is None:
+                if pin:
+                    raise SharedCacheFull(SHARED_CACHE_FULL.format(self.path))
+                return True
+
+            expires = 0.0 if ttl is None else now + ttl
+            self._write(
+                index, fingerprint, value, expires, _PINNED if pin else 0
+            )
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a value from the cache and return it.
+
+        Arguments:
+            key: The cache key.
+            default: Returned if the key is not cached.
+        """
+        fingerprint = _fingerprint(key)
+        self._open()
+
+        with _locked(self._fd):
+            found, _ = self._find(fingerprint, time())
+
+            if found is None:
+                return default
+
+            value = self.get(key, default)
+            self._write(found, _EMPTY, 0, 0.0)
+            return value
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        data = self._open()
+
+        with _locked(self._fd):
+            data[_HEADER.size:] = bytes(len(data) - _HEADER.size)
+
+    def close(self) -> None:
+        """
+        Unmap the file in this process.
+        """
+        if self._map is not None and self._pid == os.getpid():
+            self._map.close()
+            os.close(self._fd)
+
+        self._map, self._pid, self._fd = None, None, -1
+
+
+def _expired(expires: float, now: float) -> bool:
+    """
+    Whether an entry's expiry time has passed. ``0`` never expires.
+    """
+    return bool(expires) and expires <= now
+
+
+def _fingerprint(key: Hashable) -> bytes:
+    """
+    Stable fingerprint of a key, the same in every process.
+    """
+    return hashlib.blake2b(
+        repr(key).encode("utf-8"), digest_size=16, person=b"wtf-csrf-cache"
+    ).digest()
+
+
+@contextmanager
+def _locked(fd: int) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file.
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
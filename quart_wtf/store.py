@@ -0,0 +1,100 @@
+"""
+quart_wtf.store
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+
+from .cache import LRUCache
+
+
+class TokenStore(ABC):
+    """
+    Server side storage for raw CSRF tokens, used when ``WTF_CSRF_MODE`` is
+    ``"store"``. Subclass this to keep tokens in your own backend.
+    """
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """
+        Get a raw token, or ``None`` if there is no token for the key.
+
+        Arguments:
+            key: The token key.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, token: str, ttl: int | None = None) -> None:
+        """
+        Store a raw token.
+
+        Arguments:
+            key: The token key.
+            token: The raw token.
+            ttl: Seconds until the token expires. ``None`` never expires.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Remove a raw token.
+
+        Arguments:
+            key: The token key.
+        """
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Token store that keeps tokens in process memory. Tokens are not shared
+    between worker processes and are lost on restart.
+
+    Arguments:
+        maxsize: Maximum number of tokens. The least recently used token is
+            evicted when the store is full.
+    """
+    def __init__(self, maxsize: int = 10000) -> None:
+        self._cache = LRUCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, token: str, ttl: int | None = None) -> None:
+        self._cache.set(key, token, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+
+class RedisTokenStore(TokenStore):
+    """
+    Token store backed by an async Redis style client, such as
+    ``redis.asyncio.Redis``. The client owns its connection pool, so one
+    store can be shared by all requests.
+    ::
+        from redis.asyncio import Redis
+
+        app.config["WTF_CSRF_TOKEN_STORE"] = RedisTokenStore(Redis())
+
+    Any client with async ``get(key)``, ``set(key, value, ex=None)`` and
+    ``delete(key)`` methods will work.
+
+    Arguments:
+        client: The async client.
+        prefix: Prefix added to every key.
+    """
+    def __init__(self, client: Any, prefix: str = "csrf:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> str | None:
+        token = await self.client.get(self.prefix + key)
+
+        if isinstance(token, bytes):
+            token = token.decode("utf-8")
+
+        return token
+
+    async def set(self, key: str, token: str, ttl: int | None = None) -> None:
+        await self.client.set(self.prefix + key, token, ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
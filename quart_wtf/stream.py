@@ -0,0 +1,192 @@
+"""
+quart_wtf.stream
+"""
+from typing import List
+from urllib.parse import unquote_plus
+
+from quart import Request
+from werkzeug.sansio.multipart import (
+    Data,
+    Epilogue,
+    Field,
+    File,
+    MultipartDecoder,
+    NeedData
+)
+
+_FORM_MIMETYPES = {"multipart/form-data", "application/x-www-form-urlencoded"}
+
+# Private attributes of Quart's ``Body`` used to put the body back.
+_BODY_ATTRS = ("_data", "_complete", "_max_content_length")
+
+
+def _is_token_field(name: str, field_name: str) -> bool:
+    """
+    Whether a form field holds the CSRF token. If the form has a prefix,
+    the name will be ``{prefix}-csrf_token``.
+    """
+    return name.endswith(field_name)
+
+
+def _can_replay(req: Request) -> bool:
+    """
+    Whether the request body can be put back after it is read. Relies on
+    private attributes of Quart's ``Body``, so other Quart versions fall
+    back to parsing the whole form.
+    """
+    return all(hasattr(req.body, attr) for attr in _BODY_ATTRS)
+
+
+async def _form_token(req: Request, field_name: str) -> str | None:
+    """
+    Get the CSRF token by parsing the whole form.
+    """
+    form = await req.form
+    token = form.get(field_name)
+
+    if token:
+        return token
+
+    for key, value in form.items():
+        if value and _is_token_field(key, field_name):
+            return value
+
+    return None
+
+
+def _replay_body(req: Request, consumed: List[bytes]) -> None:
+    """
+    Replace the request body with one that yields the consumed chunks
+    again, followed by any data still to be received. The ASGI layer
+    appends to ``request.body``, so the rest of the body keeps streaming
+    into the replacement.
+    """
+    # pylint: disable=W0212
+    original = req.body
+    replay = req.body_class(None, original._max_content_length)
+    replay.append(b"".join(consumed))
+    replay.append(bytes(original._data))
+
+    if original._complete.is_set():
+        replay.set_complete()
+
+    req.body = replay
+
+
+async def _scan_multipart(
+    req: Request, boundary: str, field_name: str, consumed: List[bytes]
+) -> str | None:
+    """
+    Read a multipart body until the CSRF token field is found. Scanning
+    stops at the first file part, so the token must be sent before any
+    files.
+    """
+    decoder = MultipartDecoder(
+        boundary.encode("ascii"), req.max_form_memory_size
+    )
+    current = None
+    value = bytearray()
+
+    async for chunk in req.body:
+        consumed.append(chunk)
+        decoder.receive_data(chunk)
+        event = decoder.next_event()
+
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, File):
+                return None
+
+            if isinstance(event, Field):
+                current = event.name
+                value.clear()
+            elif isinstance(event, Data) and current is not None:
+                if _is_token_field(current, field_name):
+                    value.extend(event.data)
+
+                    if not event.more_data and value:
+                        return value.decode("utf-8", "replace")
+
+            event = decoder.next_event()
+
+        if isinstance(event, Epilogue):
+            return None
+
+    return None
+
+
+def _parse_pair(pair: bytes, field_name: str) -> str | None:
+    """
+    Get the token from a urlencoded ``name=value`` pair if the name matches
+    the CSRF token field.
+    """
+    name, _, value = pair.partition(b"=")
+
+    if not value or not _is_token_field(
+        unquote_plus(name.decode("utf-8", "replace")), field_name
+    ):
+        return None
+
+    return unquote_plus(value.decode("utf-8", "replace"))
+
+
+async def _scan_urlencoded(
+    req: Request, field_name: str, consumed: List[bytes]
+) -> str | None:
+    """
+    Read a urlencoded body one ``name=value`` pair at a time until the CSRF
+    token field is found.
+    """
+    pending = b""
+
+    async for chunk in req.body:
+        consumed.append(chunk)
+        pairs = (pending + chunk).split(b"&")
+        pending = pairs.pop()
+
+        for pair in pairs:
+            token = _parse_pair(pair, field_name)
+
+            if token:
+                return token
+
+    return _parse_pair(pending, field_name)
+
+
+async def stream_csrf_token(req: Request, field_name: str) -> str | None:
+    """
+    Find the CSRF token in a multipart or urlencoded request body without
+    parsing the whole body. The body is read incrementally and reading
+    stops as soon as the token field is found. Everything read so far is
+    put back, so the view can still use ``request.form`` and
+    ``request.files`` as normal.
+
+    For multipart bodies the token must come before any file parts,
+    otherwise it is treated as missing and no file data is read. If the
+    body cannot be put back with this version of Quart, the whole form is
+    parsed instead.
+
+    :param req: The current request.
+    :param field_name: The CSRF token field name.
+    """
+    mimetype = req.mimetype
+    consumed: List[bytes] = []
+
+    if mimetype in _FORM_MIMETYPES and not _can_replay(req):
+        return await _form_token(req, field_name)
+
+    try:
+        if mimetype == "multipart/form-data":
+            boundary = req.mimetype_params.get("boundary")
+
+            if not boundary:
+                return None
+
+            return await _scan_multipart(req, boundary, field_name, consumed)
+
+        if mimetype == "application/x-www-form-urlencoded":
+            return await _scan_urlencoded(req, field_name, consumed)
+
+        return None
+    finally:
+        if consumed:
+            _replay_body(req, consumed)
@@ -1,52 +1,101 @@
 """
 quart_wtf.utils
 """
+import base64
 import hashlib
 import hmac
 import logging
 import os
+import struct
+import time
 import typing as t
+from functools import lru_cache, partial
 from urllib.parse import urlparse
 
-from itsdangerous import BadData, SignatureExpired, URLSafeTimedSerializer
-from quart import current_app, g, session
+from itsdangerous import (
+    BadData,
+    BadSignature,
+    SignatureExpired,
+    TimestampSigner,
+    URLSafeTimedSerializer,
+    want_bytes
+)
+from quart import (
+    after_this_request,
+    current_app,
+    g,
+    has_websocket_context,
+    request,
+    session,
+    websocket
+)
 from wtforms import ValidationError
 
+from .cache import LRUCache
 from .const import (
+    COMPACT_TOKEN_MAC_SIZE,
+    COMPACT_TOKEN_PREFIX,
+    COOKIE_TOKEN_MISSING,
+    CSRF_COOKIE_SALT,
+    CSRF_MODE_COOKIE,
+    CSRF_MODE_STORE,
     CSRF_NOT_CONFIGURED,
+    CSRF_TOKEN_FORMAT_COMPACT,
+    CSRF_TOKEN_SALT,
+    DEFAULT_CSRF_VERIFY_CACHE_SIZE,
     FIELD_NAME_REQUIRED,
+    KEY_ID_COLLISION,
+    KEY_ID_SEPARATOR,
+    ONE_TIME_NONCE_SIZE,
+    ONE_TIME_TIME_LIMIT,
+    REPLAY_FILTER_BUCKETS,
+    SERIALIZER_CACHE_SIZE,
+    SIGNED_TOKEN_CACHE_SIZE,
     SECRET_KEY_REQUIRED,
     SESSION_TOKEN_MISSING,
+    STORE_NOT_LOADED,
+    STORE_REQUIRED,
     TOKEN_EXPIRED,
     TOKEN_INVALID,
     TOKEN_MISSING,
-    TOKEN_NO_MATCH
+    TOKEN_NO_MATCH,
+    TOKEN_NOT_ONE_TIME,
+    TOKEN_NOT_RECORDED,
+    TOKEN_USED
 )
+from .replay import ReplayFilter, ReplayFilterFull
+from .shared import SharedCacheFull
+from .settings import CSRFSettings, get_csrf_settings
 
 
 logger = logging.getLogger("Quart-WTF")
 
+# Recently signed tokens, keyed by (secret, token format, raw token).
+_signed_tokens = LRUCache(maxsize=SIGNED_TOKEN_CACHE_SIZE)
+
+# Signed tokens that already passed validation, keyed by
+# (secret, raw token, signed token) with the signing timestamp as value.
+_verified_tokens = LRUCache(maxsize=DEFAULT_CSRF_VERIFY_CACHE_SIZE)
+
 
 def _get_config(
     value: t.Any,
-    config_name: str,
     default: t.Any | None = None,
     required: bool = True,
     message: str = CSRF_NOT_CONFIGURED
 ) -> t.Any:
     """
-    Find config value based on provided value, Quart config, and default
-    value.
+    Find config value based on provided value and the compiled CSRF
+    settings.
 
     :param value: already provided config value
-    :param config_name: Quart ``config`` key
-    :param default: default value if not provided or configured
+    :param default: value from :class:`~quart_wtf.settings.CSRFSettings`
     :param required: whether the value must not be ``None``
     :param message: error message if required config is not found
-    :raises KeyError: if required config is not found
+    :raises RuntimeError: if required config is not found
     """
     if value is None:
-        value = current_app.config.get(config_name, default)
+        value = default
 
     if required and value is None:
         raise RuntimeError(message)
@@ -54,9 +103,571 @@ def _get_config(
     return value
 
 
-def generate_csrf(
+class _CSRFSigner(TimestampSigner):
+    """
+    Timestamp signer that derives the signing key only once per secret.
+    """
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._derived_keys: t.Dict[bytes, bytes] = {}
+
+    def derive_key(self, secret_key: str | bytes | None = None) -> bytes:
+        if secret_key is None:
+            secret_key = self.secret_keys[-1]
+        else:
+            secret_key = want_bytes(secret_key)
+
+        derived = self._derived_keys.get(secret_key)
+
+        if derived is None:
+            derived = super().derive_key(secret_key)
+            self._derived_keys[secret_key] = derived
+
+        return derived
+
+
+class _CSRFSerializer(URLSafeTimedSerializer):
+    """
+    Timed serializer that reuses one signer per salt instead of building
+    a new one for every ``dumps`` and ``loads`` call.
+    """
+    default_signer = _CSRFSigner
+
+    def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._signers: t.Dict[t.Any, TimestampSigner] = {}
+
+    def make_signer(self, salt: str | bytes | None = None) -> TimestampSigner:
+        if salt is None:
+            salt = self.salt
+
+        signer = self._signers.get(salt)
+
+        if signer is None:
+            signer = super().make_signer(salt)  # type: ignore
+            self._signers[salt] = signer
+
+        return signer
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def _cached_serializer(
+    secret_key: t.Any, salt: str, digest: t.Any
+) -> _CSRFSerializer:
+    """
+    Build a serializer for the registry in :func:`_get_serializer`.
+    """
+    signer_kwargs = {} if digest is None else {"digest_method": digest}
+    return _CSRFSerializer(secret_key, salt=salt, signer_kwargs=signer_kwargs)
+
+
+def _get_serializer(
+    secret_key: t.Any,
+    salt: str = CSRF_TOKEN_SALT,
+    digest: t.Any | None = None
+) -> _CSRFSerializer:
+    """
+    Return the process-wide serializer for the given secret, salt and
+    digest. Serializers are kept in a bounded LRU registry keyed by all
+    three values, so changing ``SECRET_KEY`` or ``WTF_CSRF_SECRET_KEY``
+    simply selects a new entry and the stale one is evicted over time.
+
+    :param secret_key: secret used to sign the token
+    :param salt: salt used to namespace the signature
+    :param digest: hash function for the HMAC, ``None`` for the
+        itsdangerous default
+    """
+    return _cached_serializer(_hashable(secret_key), salt, digest)
+
+
+def _hashable(secret_key: t.Any) -> t.Any:
+    """
+    Convert a list of secret keys to a tuple so it can be used as a key.
+    """
+    if isinstance(secret_key, list):
+        return tuple(secret_key)
+    return secret_key
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def _compact_key(secret_key: t.Any) -> bytes:
+    """
+    Derive the blake2b key for compact tokens from the secret key.
+    """
+    return hashlib.blake2b(
+        want_bytes(secret_key), digest_size=32, person=b"wtf-csrf-token"
+    ).digest()
+
+
+def _compact_mac(key: bytes, payload: bytes) -> bytes:
+    """
+    Truncated blake2b MAC of a compact token payload.
+    """
+    return hashlib.blake2b(
+        payload, key=key, digest_size=COMPACT_TOKEN_MAC_SIZE
+    ).digest()
+
+
+def _dumps_compact(token: str, secret_key: t.Any) -> str:
+    """
+    Sign a raw token using the compact format. The signed token is the
+    version prefix followed by the urlsafe base64 encoding of a 4 byte
+    timestamp, the raw token bytes and a truncated blake2b MAC.
+
+    :param token: hex encoded raw token
+    :param secret_key: secret used to sign the token
+    """
+    payload = struct.pack(">I", int(time.time())) + bytes.fromhex(token)
+    mac = _compact_mac(_compact_key(secret_key), payload)
+    encoded = base64.urlsafe_b64encode(payload + mac).rstrip(b"=")
+    return COMPACT_TOKEN_PREFIX + encoded.decode("ascii")
+
+
+def _loads_compact(
+    data: str, secret_key: t.Any, max_age: int | None
+) -> t.Tuple[str, int]:
+    """
+    Verify a compact token and return the raw token and its timestamp.
+
+    :param data: the signed token
+    :param secret_key: secret used to sign the token
+    :param max_age: maximum age of the token in seconds
+    :raises BadSignature: if the token is malformed or the MAC is wrong
+    :raises SignatureExpired: if the token is older than ``max_age``
+    """
+    encoded = data[len(COMPACT_TOKEN_PREFIX):]
+
+    try:
+        raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+    except (ValueError, TypeError) as error:
+        raise BadSignature("Invalid compact token.") from error
+
+    payload, mac = raw[:-COMPACT_TOKEN_MAC_SIZE], raw[-COMPACT_TOKEN_MAC_SIZE:]
+
+    if len(payload) <= 4 or not hmac.compare_digest(
+        mac, _compact_mac(_compact_key(secret_key), payload)
+    ):
+        raise BadSignature("Invalid compact token.")
+
+    timestamp = struct.unpack(">I", payload[:4])[0]
+
+    if _is_expired(timestamp, max_age):
+        raise SignatureExpired("Compact token expired.")
+
+    return payload[4:].hex(), timestamp
+
+
+def _key_id(secret_key: t.Any) -> str:
+    """
+    Short identifier for a secret key, embedded in tokens so verification
+    can go straight to the key that signed them.
+    """
+    digest = hashlib.blake2b(
+        want_bytes(secret_key), digest_size=3, person=b"wtf-csrf-kid"
+    ).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii")
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def _keyring(secret_keys: t.Tuple[t.Any, ...]) -> t.Dict[str, t.Any]:
+    """
+    Map key ids to secret keys for a rotation list. The list is ordered
+    oldest to newest, like itsdangerous, so the last key signs new tokens.
+    """
+    keys: t.Dict[str, t.Any] = {}
+
+    for secret_key in secret_keys:
+        key_id = _key_id(secret_key)
+
+        if keys.get(key_id, secret_key) != secret_key:
+            raise RuntimeError(KEY_ID_COLLISION)
+
+        keys.pop(key_id, None)
+        keys[key_id] = secret_key
+
+    return keys
+
+
+def _sign_token(raw_token: t.Any, secret_key: t.Any, token_format: str) -> str:
+    """
+    Sign a raw token. If ``secret_key`` is a list of keys, the newest key
+    is used and its key id is prepended to the signed token.
+
+    :param raw_token: the raw token to sign
+    :param secret_key: secret key, or list of keys oldest to newest
+    :param token_format: format of the signed token
+    """
+    prefix = ""
+
+    if isinstance(secret_key, (list, tuple)):
+        keys = _keyring(tuple(secret_key))
+        key_id = next(reversed(keys))
+        secret_key = keys[key_id]
+        prefix = key_id + KEY_ID_SEPARATOR
+
+    if token_format == CSRF_TOKEN_FORMAT_COMPACT:
+        return prefix + _dumps_compact(raw_token, secret_key)
+
+    return prefix + _get_serializer(secret_key).dumps(raw_token)
+
+
+def _sign_reused(
+    raw_token: t.Any, secret_key: t.Any, token_format: str, reuse: int
+) -> str:
+    """
+    Sign a raw token, reusing the token signed for the same raw token
+    within the last ``reuse`` seconds.
+
+    :param raw_token: the raw token to sign
+    :param secret_key: secret key, or list of keys oldest to newest
+    :param token_format: format of the signed token
+    :param reuse: seconds a signed token is reused for
+    """
+    cache_key = (_hashable(secret_key), token_format, raw_token)
+    token = _signed_tokens.get(cache_key)
+
+    if token is None:
+        token = _sign_token(raw_token, secret_key, token_format)
+        _signed_tokens.set(cache_key, token, ttl=reuse)
+
+    return token
+
+
+def _unsign_token(
+    data: t.Any, secret_key: t.Any, max_age: int | None
+) -> t.Tuple[t.Any, int]:
+    """
+    Verify a signed token in any supported format and return the raw token
+    and its timestamp. Tokens tagged with a key id are verified with that
+    key only. Untagged tokens are checked against every key in the list.
+
+    :param data: the signed token
+    :param secret_key: secret key, or list of keys oldest to newest
+    :param max_age: maximum age of the token in seconds
+    :raises BadData: if the token is invalid
+    :raises SignatureExpired: if the token is older than ``max_age``
+    """
+    if not isinstance(data, str):
+        data = want_bytes(data).decode("utf-8", "replace")
+
+    if isinstance(secret_key, (list, tuple)):
+        key_id, sep, signed = data.partition(KEY_ID_SEPARATOR)
+
+        if sep:
+            secret_key = _keyring(tuple(secret_key)).get(key_id)
+            data = signed
+
+            if secret_key is None:
+                raise BadSignature("Unknown key id.")
+
+    if data.startswith(COMPACT_TOKEN_PREFIX):
+        if not isinstance(secret_key, (list, tuple)):
+            return _loads_compact(data, secret_key, max_age)
+
+        for key in reversed(secret_key):
+            try:
+                return _loads_compact(data, key, max_age)
+            except SignatureExpired:
+                raise
+            except BadSignature:
+                continue
+
+        raise BadSignature("Invalid compact token.")
+
+    token, timestamp = _get_serializer(secret_key).loads(
+        data, max_age=max_age, return_timestamp=True
+    )
+    return token, int(timestamp.timestamp())
+
+
+def _scoped_token(raw_token: str, scope: str | None) -> str:
+    """
+    Derive the raw token for a scope from the raw token, using a keyed
+    blake2b hash. Nothing extra is stored, the scoped token is derived again
+    when it is validated. Returns the raw token if there is no scope.
+    """
+    if not scope:
+        return raw_token
+
+    return hashlib.blake2b(
+        scope.encode("utf-8"),
+        key=want_bytes(raw_token)[:64],
+        digest_size=20,
+        person=b"wtf-csrf-scope"
+    ).hexdigest()
+
+
+def _new_token() -> str:
+    """
+    Create a new raw CSRF token.
+    """
+    return hashlib.sha1(os.urandom(64)).hexdigest()
+
+
+def _get_cookie_name(field_name: str) -> str:
+    """
+    Name of the CSRF cookie. Defaults to the token field name.
+    """
+    return get_csrf_settings().cookie_name or field_name
+
+
+def _get_cookie_token(secret_key: t.Any, field_name: str) -> str | None:
+    """
+    Get the raw token from the signed CSRF cookie, or the token issued
+    earlier in this request. Returns ``None`` if the cookie is missing or
+    has been tampered with.
+    """
+    cookie_name = _get_cookie_name(field_name)
+    issued = g.get("_csrf_cookie_tokens", {})
+
+    if cookie_name in issued:
+        return issued[cookie_name]
+
+    cookies = websocket.cookies if has_websocket_context() else request.cookies
+    cookie = cookies.get(cookie_name)
+
+    if not cookie:
+        return None
+
+    try:
+        token = _get_serializer(secret_key, CSRF_COOKIE_SALT).loads(cookie)
+    except BadData:
+        return None
+
+    return token if isinstance(token, str) else None
+
+
+def _schedule_save() -> None:
+    """
+    Make sure :func:`save_csrf_cookie` runs at the end of this request.
+    """
+    if "_csrf_save_scheduled" not in g:
+        g._csrf_save_scheduled = True  # pylint: disable=W0212
+
+        if "csrf" not in current_app.extensions:
+            # CSRFProtect saves the cookie itself, otherwise do it here.
+            after_this_request(save_csrf_cookie)
+
+
+def _set_cookie_token(secret_key: t.Any, field_name: str, token: str) -> None:
+    """
+    Issue a new value in the signed CSRF cookie. The cookie is written to
+    the response by :func:`save_csrf_cookie`.
+    """
+    cookie_name = _get_cookie_name(field_name)
+    value = _get_serializer(secret_key, CSRF_COOKIE_SALT).dumps(token)
+
+    g.setdefault("_csrf_cookie_tokens", {})[cookie_name] = token
+    g.setdefault("_csrf_cookies", {})[cookie_name] = value
+    _schedule_save()
+
+
+def _get_store(settings: CSRFSettings) -> t.Any:
+    """
+    Get the configured token store.
+    """
+    if settings.token_store is None:
+        raise RuntimeError(STORE_REQUIRED)
+    return settings.token_store
+
+
+def _store_key(field_name: str, client_id: str) -> str:
+    """
+    Key of a raw token in the token store.
+    """
+    return f"{field_name}:{client_id}"
+
+
+async def load_csrf_token(
     secret_key: t.Any | None = None,
     token_key: t.Any | None = None
+) -> None:
+    """
+    Load the raw token from ``WTF_CSRF_TOKEN_STORE`` for this request, so
+    :func:`generate_csrf` and :func:`validate_csrf` can use it without
+    awaiting the store. Does nothing unless ``WTF_CSRF_MODE`` is
+    ``"store"``. :class:`~quart_wtf.CSRFProtect` calls this for the
+    requests it checks and :class:`~quart_wtf.QuartForm` calls it in
+    ``create_form`` and ``validate``.
+
+    :param secret_key: Used to sign the client id cookie. Default is
+        ``WTF_CSRF_SECRET_KEY`` or ``SECRET_KEY``.
+    :param token_key: Key of the token in the store. Default is
+        ``WTF_CSRF_FIELD_NAME`` or ``'csrf_token'``.
+    """
+    settings = get_csrf_settings()
+
+    if settings.mode != CSRF_MODE_STORE:
+        return
+
+    secret_key = _get_config(
+        secret_key,
+        settings.secret_key,
+        message=SECRET_KEY_REQUIRED
+    )
+
+    field_name = _get_config(
+        token_key,
+        settings.field_name,
+        message=FIELD_NAME_REQUIRED
+    )
+
+    loaded = g.setdefault("_csrf_store_tokens", {})
+
+    if field_name in loaded:
+        return
+
+    client_id = _get_cookie_token(secret_key, field_name)
+    token = None
+
+    if client_id is not None:
+        token = await _get_store(settings).get(
+            _store_key(field_name, client_id)
+        )
+
+    loaded[field_name] = token
+
+
+def _get_store_token(
+    secret_key: t.Any, field_name: str, create: bool = False
+) -> str | None:
+    """
+    Get the raw token loaded by :func:`load_csrf_token`. With ``create``,
+    a missing token is created and written to the store at the end of the
+    request.
+    """
+    loaded = g.get("_csrf_store_tokens", {})
+
+    if field_name not in loaded:
+        raise RuntimeError(STORE_NOT_LOADED)
+
+    token = loaded[field_name]
+
+    if token is None and create:
+        client_id = _get_cookie_token(secret_key, field_name)
+
+        if client_id is None:
+            client_id = _new_token()
+            _set_cookie_token(secret_key, field_name, client_id)
+
+        token = loaded[field_name] = _new_token()
+        pending = g.setdefault("_csrf_store_pending", {})
+        pending[_store_key(field_name, client_id)] = token
+        _schedule_save()
+
+    return token
+
+
+async def save_csrf_cookie(response: t.Any) -> t.Any:
+    """
+    Set any CSRF cookies issued during the request on the response, and
+    write new raw tokens to the token store. Only used when
+    ``WTF_CSRF_MODE`` is ``"cookie"`` or ``"store"``.
+
+    :param response: The response to set the cookies on.
+    """
+    settings = get_csrf_settings()
+
+    for cookie_name, value in g.pop("_csrf_cookies", {}).items():
+        response.set_cookie(
+            cookie_name,
+            value,
+            secure=settings.cookie_secure,
+            httponly=True,
+            samesite=settings.cookie_samesite
+        )
+
+    pending = g.pop("_csrf_store_pending", None)
+
+    if pending:
+        store = _get_store(settings)
+
+        for key, token in pending.items():
+            await store.set(key, token, ttl=settings.store_ttl)
+
+    return response
+
+
+def _get_replay_filter(
+    time_limit: int, settings: CSRFSettings
+) -> ReplayFilter:
+    """
+    Get the app's filter of used one-time tokens, creating it on first use.
+    Its window covers the configured time limit and is extended for any
+    longer time limit a token is validated with.
+    """
+    window = time_limit
+    replay = current_app.extensions.get("csrf_replay_filter")
+
+    if replay is None:
+        csrf = current_app.extensions.get("csrf")
+        replay = current_app.extensions["csrf_replay_filter"] = ReplayFilter(
+            window=max(window, settings.time_limit or window),
+            max_bytes=settings.one_time_max_bytes,
+            error_rate=settings.one_time_error_rate,
+            buckets=REPLAY_FILTER_BUCKETS,
+            on_overflow=None if csrf is None else partial(
+                csrf.metrics.incr, "one_time_overflow"
+            )
+        )
+    else:
+        replay.extend(window)
+
+    return replay
+
+
+def _consume_token(
+    token: str, time_limit: int, settings: CSRFSettings
+) -> None:
+    """
+    Mark a one-time token as used. A token can be checked any number of
+    times within the request that used it, for example by both
+    :class:`~quart_wtf.CSRFProtect` and a form. Spent tokens are recorded
+    in ``WTF_CSRF_SHARED_CACHE`` if it is set, otherwise in the app's
+    replay filter.
+
+    :raises ValidationError: if the token was used by an earlier request,
+        or there is no room to record it.
+    """
+    consumed = g.setdefault("_csrf_consumed_tokens", set())
+
+    if token in consumed:
+        return
+
+    if settings.shared_cache is not None:
+        try:
+            # Pinned, so other entries never evict it and let the token
+            # be replayed.
+            added = settings.shared_cache.add(
+                ("replay", token),
+                1,
+                ttl=time_limit,
+                pin=True
+            )
+        except SharedCacheFull as error:
+            logger.warning(error.args[0])
+            raise ValidationError(TOKEN_NOT_RECORDED) from None
+    else:
+        try:
+            added = _get_replay_filter(time_limit, settings).add(
+                token.encode("utf-8")
+            )
+        except ReplayFilterFull as error:
+            logger.warning(error.args[0])
+            raise ValidationError(TOKEN_NOT_RECORDED) from None
+
+    if not added:
+        raise ValidationError(TOKEN_USED)
+
+    consumed.add(token)
+
+
+def generate_csrf(
+    secret_key: t.Any | None = None,
+    token_key: t.Any | None = None,
+    one_time: bool | None = None,
+    scope: str | None = None,
+    time_limit: int | None = None
 ) -> t.Any:
     """
     Generate a CSRF token. The token is cached for a request, so multiple
@@ -65,51 +676,136 @@ def generate_csrf(
     During testing, it might be useful to access the signed token in
     ``g.csrf_token`` and the raw token in ``session['csrf_token']``.
 
+    If ``WTF_CSRF_MODE`` is ``"cookie"`` the raw token is kept in a signed
+    cookie instead of the session, so generating a token never modifies
+    the session. If it is ``"store"`` the raw token is kept in
+    ``WTF_CSRF_TOKEN_STORE`` and must be loaded first with
+    :func:`load_csrf_token`.
+
+    Set ``WTF_CSRF_TOKEN_REUSE`` to keep returning the same signed token
+    for a raw token for that many seconds across requests, instead of
+    signing it again for every request.
+
+    One-time tokens carry a random nonce, so every call returns a new
+    token and each one is accepted only once by :func:`validate_csrf`.
+
     :param secret_key: Used to securely sign the token. Default is
         ``WTF_CSRF_SECRET_KEY`` or ``SECRET_KEY``.
     :param token_key: Key where token is stored in session for comparison.
         Default is ``WTF_CSRF_FIELD_NAME`` or ``'csrf_token'``.
+    :param one_time: Generate a one-time token. Default is
+        ``WTF_CSRF_ONE_TIME`` or ``False``.
+    :param scope: Bind the token to a scope, such as the endpoint the form
+        is submitted to. It is only accepted by :func:`validate_csrf` with
+        the same scope.
+    :param time_limit: Number of seconds the token will be validated with.
+        Default is ``WTF_CSRF_TIME_LIMIT``. One-time tokens require one.
+    :raises RuntimeError: if a one-time token has no time limit.
     """
+    settings = get_csrf_settings()
+
     secret_key = _get_config(
         secret_key,
-        "WTF_CSRF_SECRET_KEY",
-        current_app.secret_key,
+        settings.secret_key,
         message=SECRET_KEY_REQUIRED
     )
 
     field_name = _get_config(
         token_key,
-        "WTF_CSRF_FIELD_NAME",
-        "csrf_token",
+        settings.field_name,
         message=FIELD_NAME_REQUIRED
     )
 
-    if field_name not in g:
-        serial = URLSafeTimedSerializer(secret_key, salt="wtf-csrf-token")
+    one_time = _get_config(one_time, settings.one_time, required=False)
+    time_limit = _get_config(time_limit, settings.time_limit, required=False)
+
+    if one_time and time_limit is None:
+        raise RuntimeError(ONE_TIME_TIME_LIMIT)
+
+    cache_name = f"{field_name}:{scope}" if scope else field_name
+
+    if cache_name in g and not one_time:
+        return g.get(cache_name)
 
+    sign = partial(
+        _sign_token,
+        secret_key=secret_key,
+        token_format=settings.token_format
+    )
+    reuse = settings.token_reuse
+
+    if settings.time_limit:
+        # A reused token must stay valid for most of its time limit.
+        reuse = min(reuse, settings.time_limit // 2)
+
+    if reuse and not one_time:
+        sign = partial(
+            _sign_reused,
+            secret_key=secret_key,
+            token_format=settings.token_format,
+            reuse=reuse
+        )
+
+    nonce = os.urandom(ONE_TIME_NONCE_SIZE).hex() if one_time else ""
+
+    if settings.mode == CSRF_MODE_COOKIE:
+        raw_token = _get_cookie_token(secret_key, field_name)
+
+        if raw_token is None:
+            raw_token = _new_token()
+            _set_cookie_token(secret_key, field_name, raw_token)
+
+        token = sign(_scoped_token(raw_token, scope) + nonce)
+    elif settings.mode == CSRF_MODE_STORE:
+        raw_token = _get_store_token(secret_key, field_name, create=True)
+        token = sign(_scoped_token(raw_token, scope) + nonce)
+    else:
         if field_name not in session:
-            session[field_name] = hashlib.sha1(os.urandom(64)).hexdigest()
+            session[field_name] = _new_token()
 
         try:
-            token = serial.dumps(session[field_name])
-        except TypeError:
-            session[field_name] = hashlib.sha1(os.urandom(64)).hexdigest()
-            token = serial.dumps(session[field_name])
+            token = sign(_scoped_token(session[field_name], scope) + nonce)
+        except (TypeError, ValueError):
+            session[field_name] = _new_token()
+            token = sign(_scoped_token(session[field_name], scope) + nonce)
+
+    if one_time:
+        return token
 
-        setattr(g, field_name, token)
+    setattr(g, cache_name, token)
+    return token
 
-    return g.get(field_name)
+
+async def render_csrf(
+    secret_key: t.Any | None = None,
+    token_key: t.Any | None = None,
+    one_time: bool | None = None,
+    scope: str | None = None,
+    time_limit: int | None = None
+) -> t.Any:
+    """
+    Generate a CSRF token, loading the raw token from the token store
+    first if needed. :class:`~quart_wtf.CSRFProtect` registers this as the
+    ``csrf_token`` template global, so templates render tokens in
+    ``"store"`` mode without the view calling :func:`load_csrf_token`.
+    Takes the same arguments as :func:`generate_csrf`.
+    """
+    await load_csrf_token(secret_key, token_key)
+    return generate_csrf(secret_key, token_key, one_time, scope, time_limit)
 
 
 def validate_csrf(
     data: t.Any,
     secret_key: t.Any | None = None,
     time_limit: int | None = None,
-    token_key: t.Any | None = None
+    token_key: t.Any | None = None,
+    one_time: bool | None = None,
+    scope: str | None = None
 ) -> None:
     """
     Check if the given data is a valid CSRF token. This compares the given
-    signed token to the one stored in the session.
+    signed token to the one stored in the session, or in the CSRF cookie
+    when ``WTF_CSRF_MODE`` is ``"cookie"``.
 
     :param data: The signed CSRF token to be checked.
     :param secret_key: Used to securely sign the token. Default is
@@ -118,49 +814,132 @@ def validate_csrf(
         ``WTF_CSRF_TIME_LIMIT`` or 3600 seconds (60 minutes).
     :param token_key: Key where token is stored in session for comparison.
         Default is ``WTF_CSRF_FIELD_NAME`` or ``'csrf_token'``.
+    :param one_time: Only accept one-time tokens, and reject a token that
+        was already used. Default is ``WTF_CSRF_ONE_TIME`` or ``False``.
+    :param scope: Only accept tokens generated for this scope.
     :raises ValidationError: Contains the reason that validation failed.
         Raises ``ValidationError`` with a specific error message rather than
         returning ``True`` or ``False``.
+    :raises RuntimeError: if one-time tokens are checked without a time
+        limit, since spent tokens could not be remembered for long enough.
     """
+    settings = get_csrf_settings()
+
     secret_key = _get_config(
         secret_key,
-        "WTF_CSRF_SECRET_KEY",
-        current_app.secret_key,
+        settings.secret_key,
         message=SECRET_KEY_REQUIRED
     )
 
     field_name = _get_config(
         token_key,
-        "WTF_CSRF_FIELD_NAME",
-        "csrf_token",
+        settings.field_name,
         message=FIELD_NAME_REQUIRED
     )
 
     time_limit = _get_config(
         time_limit,
-        "WTF_CSRF_TIME_LIMIT",
-        3600,
+        settings.time_limit,
         required=False
     )
 
+    one_time = _get_config(one_time, settings.one_time, required=False)
+
+    if one_time and time_limit is None:
+        raise RuntimeError(ONE_TIME_TIME_LIMIT)
+
     if not data:
         raise ValidationError(TOKEN_MISSING)
 
-    if field_name not in session:
+    if settings.mode == CSRF_MODE_COOKIE:
+        raw_token = _get_cookie_token(secret_key, field_name)
+
+        if raw_token is None:
+            raise ValidationError(COOKIE_TOKEN_MISSING)
+    elif settings.mode == CSRF_MODE_STORE:
+        raw_token = _get_store_token(secret_key, field_name)
+
+        if raw_token is None:
+            raise ValidationError(SESSION_TOKEN_MISSING)
+    elif field_name not in session:
         raise ValidationError(SESSION_TOKEN_MISSING)
+    else:
+        raw_token = session[field_name]
+
+    if scope and isinstance(raw_token, str):
+        raw_token = _scoped_token(raw_token, scope)
+
+    # One-time tokens are never seen twice, so they skip the cache.
+    cache = None if one_time else _get_verify_cache(settings)
+    cache_key = (_hashable(secret_key), raw_token, data)
 
-    serial = URLSafeTimedSerializer(secret_key, salt="wtf-csrf-token")
+    if cache is not None:
+        timestamp = cache.get(cache_key)
+
+        if timestamp is not None:
+            if not _is_expired(timestamp, time_limit):
+                return
+
+            cache.pop(cache_key)
+            raise ValidationError(TOKEN_EXPIRED)
 
     try:
-        token = serial.loads(data, max_age=time_limit)
+        token, timestamp = _unsign_token(data, secret_key, time_limit)
     except SignatureExpired as error:
         raise ValidationError(TOKEN_EXPIRED) from error
     except BadData as error:
         raise ValidationError(TOKEN_INVALID) from error
 
-    if not hmac.compare_digest(session[field_name], token):
+    if not isinstance(token, str) or not isinstance(raw_token, str):
         raise ValidationError(TOKEN_NO_MATCH)
 
+    nonce = token[len(raw_token):]
+
+    if not hmac.compare_digest(raw_token, token[:len(raw_token)]) or \
+            len(nonce) not in (0, ONE_TIME_NONCE_SIZE * 2):
+        raise ValidationError(TOKEN_NO_MATCH)
+
+    if one_time:
+        if not nonce:
+            raise ValidationError(TOKEN_NOT_ONE_TIME)
+
+        _consume_token(token, time_limit, settings)
+
+    if cache is not None:
+        ttl = None
+
+        if time_limit is not None:
+            ttl = timestamp + time_limit - time.time()
+
+        cache.set(cache_key, timestamp, ttl=ttl)
+
+
+def _get_verify_cache(settings: CSRFSettings) -> t.Any | None:
+    """
+    Get the cache of verified tokens: ``WTF_CSRF_SHARED_CACHE`` if it is
+    set, otherwise the in-process cache if ``WTF_CSRF_VERIFY_CACHE_SIZE``
+    enables it.
+    """
+    if settings.shared_cache is not None:
+        return settings.shared_cache
+
+    if not settings.verify_cache_size:
+        return None
+
+    _verified_tokens.maxsize = settings.verify_cache_size
+    return _verified_tokens
+
+
+def _is_expired(timestamp: int, time_limit: int | None) -> bool:
+    """
+    Apply the same expiry rules as the serializer to a cached timestamp.
+    """
+    if time_limit is None:
+        return False
+
+    age = int(time.time()) - timestamp
+    return age > time_limit or age < 0
+
 
 def same_orgin(current_uri: str, compare_uri: str) -> bool:
     """
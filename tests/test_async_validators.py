@@ -6,7 +6,9 @@ import pytest
 from quart import Quart
 from quart.typing import TestClientProtocol
 from wtforms import StringField  # type: ignore
-from wtforms.validators import DataRequired, ValidationError  # type: ignore
+from wtforms.validators import (  # type: ignore
+    DataRequired, Length, ValidationError
+)
 
 from quart_wtf import QuartForm
 
@@ -158,3 +160,135 @@ async def test_async_validator_exception(
             assert False
 
     await client.post('/', form={'field1': 'xxx1', 'field2': 'xxx2'})
+
+
+def test_async_validators_found_at_class_creation() -> None:
+    """
+    Tests async validators are collected once, when the class is created.
+    """
+    assert set(FormWithAsyncValidators._async_validators) == {
+        'field1', 'field2'
+    }
+    assert QuartForm._async_validators == {}
+
+    class SubForm(FormWithAsyncValidators):
+        field3 = StringField()
+
+        async def async_validator_field3(self, field):  # type: ignore
+            pass
+
+    assert set(SubForm._async_validators) == {'field1', 'field2', 'field3'}
+
+
+@pytest.mark.asyncio
+async def test_async_validators_run(app: Quart) -> None:
+    """
+    Tests async validators run unless the validation chain was stopped,
+    and the extra validators passed in are left untouched.
+    """
+    async with app.test_request_context('/'):
+        form = FormWithAsyncValidators(
+            data={'field1': 'xxx1'}, meta={'csrf': False}
+        )
+        extra = {'field1': []}  # type: ignore
+        assert await form.validate(extra_validators=extra) is False
+        assert list(form.errors['field1']) == ['Field value is not correct.']
+        assert form.errors['field2'] == ['This field is required.']
+        assert extra == {'field1': []}
+
+        form = FormWithAsyncValidators(
+            data={'field1': 'value1', 'field2': 'value2'},
+            meta={'csrf': False},
+            prefix='form'
+        )
+        assert await form.validate() is True
+
+
+class SlowForm(QuartForm):
+    """
+    Form with one fast failing and one slow async validator.
+    """
+    class Meta:
+        csrf = False
+
+    fast = StringField()
+    slow = StringField()
+    cancelled = False
+
+    async def async_validate_fast(self, field):  # type: ignore
+        raise ValidationError('Fast failure.')
+
+    async def async_validate_slow(self, field):  # type: ignore
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            SlowForm.cancelled = True
+            raise
+
+
+@pytest.mark.asyncio
+async def test_async_fail_fast(app: Quart) -> None:
+    """
+    Tests fail fast cancels async validators after the first error.
+    """
+    async with app.test_request_context('/'):
+        form = SlowForm()
+        assert await asyncio.wait_for(form.validate(fail_fast=True), 1) \
+            is False
+        assert form.errors == {'fast': ('Fast failure.',)}
+        assert SlowForm.cancelled
+
+
+@pytest.mark.asyncio
+async def test_async_fail_fast_on_sync_error(app: Quart) -> None:
+    """
+    Tests fail fast skips waiting for async validators after a sync error.
+    """
+    async with app.test_request_context('/'):
+        form = SlowForm(meta={'async_fail_fast': True})
+        extra = {'fast': [DataRequired()]}
+        assert await asyncio.wait_for(form.validate(extra), 1) is False
+        assert form.errors == {'fast': ['This field is required.']}
+
+
+@pytest.mark.asyncio
+async def test_async_timeout(app: Quart) -> None:
+    """
+    Tests slow async validators fail with a timeout error.
+    """
+    async with app.test_request_context('/'):
+        form = SlowForm(meta={'async_timeout': 0.01})
+        assert await asyncio.wait_for(form.validate(), 1) is False
+        assert form.errors == {
+            'fast': ('Fast failure.',),
+            'slow': ('The validation timed out.',)
+        }
+
+
+class LengthForm(QuartForm):
+    """
+    Form with a sync validator before its async validator.
+    """
+    class Meta:
+        csrf = False
+
+    name = StringField(validators=[Length(min=5)])
+    lookups = 0
+
+    async def async_validate_name(self, field):  # type: ignore
+        LengthForm.lookups += 1
+
+
+@pytest.mark.asyncio
+async def test_async_skipped_after_sync_error(app: Quart) -> None:
+    """
+    Tests async validators do not run when a sync validator failed.
+    """
+    async with app.test_request_context('/'):
+        form = LengthForm(data={'name': 'ab'})
+        assert await form.validate() is False
+        assert LengthForm.lookups == 0
+
+        form = LengthForm(data={'name': 'abcdef'})
+        assert await form.validate() is True
+        assert LengthForm.lookups == 1
@@ -0,0 +1,182 @@
+"""
+tests.test_batch
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from quart import Quart
+from wtforms import StringField, ValidationError  # type: ignore
+
+from quart_wtf import QuartForm
+from quart_wtf.batch import BatchLoader
+from quart_wtf.const import BATCH_LIMIT_HELD, BATCH_RESULT_MISMATCH
+from quart_wtf.limits import concurrency_limit, set_concurrency_limit
+
+# pylint: skip-file
+
+batches: List[List[str]] = []
+
+
+async def load_users(usernames: List[str]) -> Dict[str, Any]:
+    batches.append(usernames)
+    await asyncio.sleep(.01)
+    return {name: {"username": name} for name in usernames if name != "free"}
+
+
+users = BatchLoader(load_users)
+
+
+class SignupForm(QuartForm):
+    """
+    Form validating usernames through a batch loader.
+    """
+    class Meta:
+        csrf = False
+
+    username = StringField()
+
+    async def async_validate_username(self, field):  # type: ignore
+        if await users.load(field.data) is not None:
+            raise ValidationError("Username taken.")
+
+
+@pytest.fixture(autouse=True)
+def reset_batches() -> None:
+    batches.clear()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_forms(app: Quart) -> None:
+    """
+    Tests concurrent forms share one batched lookup.
+    """
+    async def validate(username: str) -> bool:
+        async with app.test_request_context("/"):
+            return await SignupForm(data={"username": username}).validate()
+
+    results = await asyncio.gather(
+        validate("free"), validate("taken"), validate("taken")
+    )
+    assert results == [True, False, False]
+    assert batches == [["free", "taken"]]
+
+
+@pytest.mark.asyncio
+async def test_single_flight() -> None:
+    """
+    Tests a key that is being loaded joins the running lookup.
+    """
+    first = asyncio.ensure_future(users.load("a"))
+
+    while not batches:
+        await asyncio.sleep(0)
+
+    assert await users.load("a") == {"username": "a"}
+    assert await first == {"username": "a"}
+    assert batches == [["a"]]
+
+    await users.load("a")
+    assert batches == [["a"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size() -> None:
+    """
+    Tests full batches are sent straight away.
+    """
+    loader = BatchLoader(load_users, max_batch_size=2, delay=10)
+    assert await loader.load_many(["a", "b"]) == [
+        {"username": "a"}, {"username": "b"}
+    ]
+    assert batches == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_sequence_results() -> None:
+    """
+    Tests sequence results are matched to keys by position.
+    """
+    async def double(keys: List[int]) -> List[int]:
+        return [key * 2 for key in keys]
+
+    async def short(keys: List[int]) -> List[int]:
+        return []
+
+    assert await BatchLoader(double).load_many([1, 2, 1]) == [2, 4, 2]
+
+    with pytest.raises(ValueError, match=BATCH_RESULT_MISMATCH.format(0, 1)):
+        await BatchLoader(short).load(1)
+
+
+@pytest.mark.asyncio
+async def test_batch_errors() -> None:
+    """
+    Tests every caller in a failed batch gets the exception.
+    """
+    async def fail(keys: List[str]) -> Dict[str, Any]:
+        raise RuntimeError("down")
+
+    loader = BatchLoader(fail)
+    results = await asyncio.gather(
+        loader.load("a"), loader.load("b"), return_exceptions=True
+    )
+    assert [str(result) for result in results] == ["down", "down"]
+    assert not loader._futures
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller() -> None:
+    """
+    Tests cancelling one caller does not cancel the shared lookup.
+    """
+    first = asyncio.ensure_future(users.load("a"))
+    second = asyncio.ensure_future(users.load("a"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == {"username": "a"}
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_loader_resource() -> None:
+    """
+    Tests the loader holds its resource's limit while a batch runs.
+    """
+    set_concurrency_limit("test-batch", 1)
+    loader = BatchLoader(load_users, max_batch_size=1, resource="test-batch")
+    results = await asyncio.wait_for(
+        loader.load_many(["a", "b", "c", "d", "e"]), 1
+    )
+    assert [result["username"] for result in results] == list("abcde")
+
+
+@pytest.mark.asyncio
+async def test_loader_resource_held(app: Quart) -> None:
+    """
+    Tests loading from a validator holding the loader's resource fails
+    instead of deadlocking.
+    """
+    loader = BatchLoader(load_users, resource="test-batch-held")
+
+    class LimitedForm(QuartForm):
+        class Meta:
+            csrf = False
+
+        username = StringField()
+
+        @concurrency_limit(2, resource="test-batch-held")
+        async def async_validate_username(self, field):  # type: ignore
+            await loader.load(field.data)
+
+    async def validate(username: str) -> bool:
+        async with app.test_request_context("/"):
+            return await LimitedForm(data={"username": username}).validate()
+
+    with pytest.raises(
+        RuntimeError, match=BATCH_LIMIT_HELD.format("test-batch-held")
+    ):
+        await asyncio.wait_for(
+            asyncio.gather(*(validate(name) for name in "abcde")), 1
+        )
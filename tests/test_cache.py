@@ -0,0 +1,205 @@
+"""
+tests.test_cache
+"""
+from typing import Any, List
+
+import pytest
+from quart import Quart
+from wtforms import StringField, ValidationError  # type: ignore
+
+from quart_wtf import QuartForm, cache
+from quart_wtf.cache import LRUCache, cached_validator
+from quart_wtf.limits import concurrency_limit, get_semaphore
+
+calls: List[str] = []
+
+
+class CachedForm(QuartForm):
+    """
+    Form with memoized async validators.
+    """
+    class Meta:
+        csrf = False
+
+    username = StringField()
+    email = StringField()
+    nickname = StringField()
+
+    @cached_validator(ttl=60, maxsize=2)
+    @concurrency_limit(1, resource="test-cache")
+    async def async_validate_username(self, field):  # type: ignore
+        if field.data is not None:
+            calls.append(field.data)
+
+        if field.data == "taken":
+            raise ValidationError("Username taken.")
+
+    @cached_validator(cache_failures=False, key=lambda form, field: 1)
+    async def async_validate_email(self, field):  # type: ignore
+        if field.data is not None:
+            calls.append(field.data)
+
+        if field.data == "taken":
+            raise ValidationError("Email taken.")
+
+    @cached_validator(cache_passes=False)
+    async def async_validate_nickname(self, field):  # type: ignore
+        if field.data is not None:
+            calls.append(field.data)
+
+        if field.data == "taken":
+            raise ValidationError("Nickname taken.")
+
+
+def test_lru_eviction() -> None:
+    """
+    Tests the least recently used entry is evicted.
+    """
+    lru = LRUCache(maxsize=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert "b" not in lru
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+    assert len(lru) == 2
+
+
+def test_ttl_expiry(monkeypatch: Any) -> None:
+    """
+    Tests entries expire after their time to live.
+    """
+    now = [100.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+
+    lru = LRUCache()
+    lru.set("a", 1, ttl=10)
+    lru.set("b", 2)
+    now[0] = 110.0
+
+    assert lru.get("a", "missing") == "missing"
+    assert lru.get("b") == 2
+    assert len(lru) == 1
+
+
+def test_disabled() -> None:
+    """
+    Tests a cache with no size stores nothing.
+    """
+    lru = LRUCache(maxsize=0)
+    lru.set("a", 1)
+    assert lru.get("a") is None
+    assert lru.pop("a", "missing") == "missing"
+
+
+@pytest.fixture
+def validate(app: Quart) -> Any:
+    """
+    Validates a cached form with the given data.
+    """
+    calls.clear()
+    CachedForm.async_validate_username.cache_clear()
+    CachedForm.async_validate_email.cache_clear()
+    CachedForm.async_validate_nickname.cache_clear()
+
+    async def validate(**data: Any) -> CachedForm:
+        async with app.test_request_context("/"):
+            form = CachedForm(data=data)
+            await form.validate()
+            return form
+
+    return validate
+
+
+@pytest.mark.asyncio
+async def test_cached_validator(validate: Any) -> None:
+    """
+    Tests passes and errors are cached by field value.
+    """
+    for _ in range(2):
+        form = await validate(username="free")
+        assert not form.errors
+        form = await validate(username="taken")
+        assert form.errors == {"username": ("Username taken.",)}
+
+    assert calls == ["free", "taken"]
+
+    CachedForm.async_validate_username.invalidate("taken")
+    await validate(username="taken")
+    assert calls == ["free", "taken", "taken"]
+
+
+@pytest.mark.asyncio
+async def test_cached_validator_eviction(
+    validate: Any, monkeypatch: Any
+) -> None:
+    """
+    Tests cached results are evicted and expire.
+    """
+    now = [100.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+
+    for username in ("a", "b", "c", "a"):
+        await validate(username=username)
+
+    assert calls == ["a", "b", "c", "a"]
+
+    now[0] = 161.0
+    await validate(username="a")
+    assert calls == ["a", "b", "c", "a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_cached_validator_failures(validate: Any) -> None:
+    """
+    Tests validation errors are not cached when disabled.
+    """
+    for _ in range(2):
+        form = await validate(email="taken")
+        assert form.errors == {"email": ("Email taken.",)}
+        await validate(email="free")
+
+    assert calls == ["taken", "free", "taken"]
+
+    CachedForm.async_validate_email.invalidate("free", 1)
+    await validate(email="free")
+    assert calls == ["taken", "free", "taken", "free"]
+
+
+@pytest.mark.asyncio
+async def test_cached_validator_passes(validate: Any) -> None:
+    """
+    Tests passes are not cached when disabled.
+    """
+    for _ in range(2):
+        form = await validate(nickname="taken")
+        assert form.errors == {"nickname": ("Nickname taken.",)}
+        await validate(nickname="free")
+
+    assert calls == ["taken", "free", "free"]
+
+
+@pytest.mark.asyncio
+async def test_cached_validator_skips_limit(validate: Any) -> None:
+    """
+    Tests cached results do not wait for the validator's limit.
+    """
+    await validate(username="free")
+
+    async with get_semaphore("test-cache"):
+        form = await validate(username="free")
+
+    assert not form.errors
+    assert calls == ["free"]
+
+
+@pytest.mark.asyncio
+async def test_cached_validator_unhashable(validate: Any) -> None:
+    """
+    Tests unhashable values are validated every time.
+    """
+    await validate(username=["taken"])
+    await validate(username=["taken"])
+    assert calls == [["taken"], ["taken"]]
@@ -1,14 +1,25 @@
 """
 tests.test_csrf_extension
 """
+from io import BytesIO
 from typing import Any, List
 import pytest
-from quart import Quart, Blueprint, g, render_template_string, Response
+from quart import (
+    Quart, Blueprint, g, render_template_string, request, Response, websocket
+)
+from quart.datastructures import FileStorage
+from quart.testing import WebsocketResponseError
 from quart.typing import TestClientProtocol
+from werkzeug.test import encode_multipart
+from wtforms import StringField, ValidationError
 
-from quart_wtf import CSRFError, CSRFProtect, QuartForm
-from quart_wtf.const import REFERRER_HEADER, REFERRER_HOST, TOKEN_MISSING
-from quart_wtf.utils import logger, generate_csrf
+from quart_wtf import CSRFError, CSRFProtect, QuartForm, stream
+from quart_wtf.const import (
+    COOKIE_TOKEN_MISSING, ONE_TIME_TIME_LIMIT, ORIGIN_HOST, REFERRER_HEADER,
+    REFERRER_HOST, TOKEN_INVALID, TOKEN_MISSING, TOKEN_NO_MATCH,
+    TOKEN_NOT_RECORDED, TOKEN_USED
+)
+from quart_wtf.utils import logger, generate_csrf, validate_csrf
 
 # pylint: skip-file
 
@@ -52,7 +63,9 @@ async def test_render_token(app: Quart) -> None:
 
 
 @pytest.mark.asyncio
-async def test_protect(app: Quart, client: TestClientProtocol) -> None:
+async def test_protect(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
     """
     Tests CSRF protection.
     """
@@ -64,16 +77,20 @@ async def test_protect(app: Quart, client: TestClientProtocol) -> None:
     assert TOKEN_MISSING in data
 
     app.config["WTF_CSRF_ENABLED"] = False
+    csrf.reload_config(app)
     response = await client.post("/")
     data = await response.get_data()
     assert data == b""
     app.config["WTF_CSRF_ENABLED"] = True
+    csrf.reload_config(app)
 
     app.config["WTF_CSRF_CHECK_DEFAULT"] = False
+    csrf.reload_config(app)
     response = await client.post("/")
     data = await response.get_data()
     assert data == b""
     app.config["WTF_CSRF_CHECK_DEFAULT"] = True
+    csrf.reload_config(app)
 
     response = await client.options("/")
     assert response.status_code == 200
@@ -93,6 +110,146 @@ async def test_protect(app: Quart, client: TestClientProtocol) -> None:
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_header_token_skips_body(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests the request body is not parsed when a header carries the token.
+    """
+    @app.route("/upload", methods=["POST"])
+    async def upload() -> str:
+        return str(request._form is None)  # pylint: disable=W0212
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    response = await client.post(
+        "/upload", form={"field": "value"}, headers={"X-CSRF-Token": token}
+    )
+    assert await response.get_data(as_text=True) == "True"
+
+    response = await client.post("/upload", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == "False"
+
+    app.config["WTF_CSRF_LOOKUP_ORDER"] = ["form", "headers"]
+    csrf.reload_config(app)
+    response = await client.post(
+        "/upload", form={"field": "value"}, headers={"X-CSRF-Token": token}
+    )
+    assert await response.get_data(as_text=True) == "False"
+
+
+@pytest.mark.asyncio
+async def test_stream_token(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests streaming the token out of the body leaves it readable by the
+    view.
+    """
+    app.config["WTF_CSRF_LOOKUP_ORDER"] = ["headers", "stream"]
+    csrf.reload_config(app)
+
+    @app.route("/upload", methods=["POST"])
+    async def upload() -> str:
+        form = await request.form
+        files = await request.files
+        data = files["file"].read() if "file" in files else b""
+        return f"{form['field']}:{data.decode()}"
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    response = await client.post(
+        "/upload", form={"csrf_token": token, "field": "value"}
+    )
+    assert await response.get_data(as_text=True) == "value:"
+
+    response = await client.post(
+        "/upload", form={"field": "value", "prefix-csrf_token": token}
+    )
+    assert await response.get_data(as_text=True) == "value:"
+
+    boundary, body = encode_multipart({
+        "csrf_token": token,
+        "field": "value",
+        "file": FileStorage(BytesIO(b"data"), filename="a.txt")
+    })
+    response = await client.post(
+        "/upload",
+        data=body,
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}"
+        }
+    )
+    assert await response.get_data(as_text=True) == "value:data"
+
+    response = await client.post(
+        "/upload", form={"csrf_token": "bad", "field": "value"}
+    )
+    assert response.status_code == 400
+
+    # the test client sends files first, so the token is never reached
+    response = await client.post(
+        "/upload",
+        form={"csrf_token": token, "field": "value"},
+        files={"file": FileStorage(BytesIO(b"data"), filename="a.txt")}
+    )
+    assert response.status_code == 400
+    assert TOKEN_MISSING in await response.get_data(as_text=True)
+
+
+@pytest.mark.asyncio
+async def test_stream_token_invalid_utf8(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests a token field that is not valid UTF-8 fails the CSRF check.
+    """
+    app.config["WTF_CSRF_LOOKUP_ORDER"] = ["stream"]
+    csrf.reload_config(app)
+    body = (
+        b"--x\r\n"
+        b'Content-Disposition: form-data; name="csrf_token"\r\n\r\n'
+        b"\xff\xfe\r\n"
+        b"--x--\r\n"
+    )
+    await client.get("/")
+
+    response = await client.post(
+        "/", data=body,
+        headers={"Content-Type": "multipart/form-data; boundary=x"}
+    )
+    assert response.status_code == 400
+    assert TOKEN_INVALID in await response.get_data(as_text=True)
+
+
+@pytest.mark.asyncio
+async def test_stream_token_fallback(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol,
+    monkeypatch: Any
+) -> None:
+    """
+    Tests the whole form is parsed if the body cannot be put back.
+    """
+    monkeypatch.setattr(stream, "_BODY_ATTRS", ("_not_an_attribute",))
+    app.config["WTF_CSRF_LOOKUP_ORDER"] = ["stream"]
+    csrf.reload_config(app)
+
+    @app.route("/field", methods=["POST"])
+    async def field() -> str:
+        return (await request.form)["field"]
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    response = await client.post(
+        "/field", form={"field": "value", "prefix-csrf_token": token}
+    )
+    assert await response.get_data(as_text=True) == "value"
+
+
 @pytest.mark.asyncio
 async def test_same_origin(
     app: Quart, client: TestClientProtocol
@@ -143,6 +300,45 @@ async def test_same_origin(
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_trusted_origins(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests the Origin header is checked before the referrer and that
+    trusted origins are allowed.
+    """
+    app.config["WTF_CSRF_TRUSTED_ORIGINS"] = ["HTTPS://Trusted.example:443/"]
+    csrf.reload_config(app)
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    async def post(**headers: str) -> Response:
+        return await client.post(
+            "/", scheme="https", headers={"X-CSRF-Token": token, **headers}
+        )
+
+    response = await post(Origin="https://localhost")
+    assert response.status_code == 200
+
+    response = await post(Origin="https://trusted.example")
+    assert response.status_code == 200
+
+    response = await post(Referer="https://trusted.example/form")
+    assert response.status_code == 200
+
+    response = await post(
+        Origin="https://other.example", Referer="https://localhost/"
+    )
+    assert ORIGIN_HOST in await response.get_data(as_text=True)
+
+    response = await post(Origin="null", Referer="https://other/")
+    assert REFERRER_HOST in await response.get_data(as_text=True)
+
+    response = await post(Referer="not a url")
+    assert REFERRER_HOST in await response.get_data(as_text=True)
+
+
 @pytest.mark.asyncio
 async def test_form_csrf_short_circuit(
     app: Quart, client: TestClientProtocol
@@ -184,6 +380,32 @@ async def test_exempt_view(
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_exempt_index_refreshed(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Test the exempt endpoint index picks up routes and exemptions added
+    after the first request.
+    """
+    response = await client.post("/")
+    assert response.status_code == 400
+    assert "index" not in csrf._exempt_endpoints(app)
+
+    @app.route("/late", methods=["POST"])
+    @csrf.exempt  # typing: ignore
+    async def late() -> None:
+        pass
+
+    response = await client.post("/late")
+    assert response.status_code == 200
+    assert csrf._exempt_endpoints(app) == {"late"}
+
+    csrf.exempt("tests.test_csrf_extension.index")
+    response = await client.post("/")
+    assert response.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_manual_protect(
     app: Quart, csrf: CSRFProtect, client: TestClientProtocol
@@ -252,3 +474,310 @@ async def test_validate_error_logged(
     await client.post("/")
     assert len(messages) == 1
     assert messages[0] == "The CSRF token is missing."  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_cookie_mode(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests the double submit cookie mode leaves the session untouched.
+    """
+    app.config["WTF_CSRF_MODE"] = "cookie"
+    csrf.reload_config(app)
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+    cookies = response.headers.getlist("Set-Cookie")
+    assert len(cookies) == 1
+    assert cookies[0].startswith("csrf_token=")
+    assert "HttpOnly" in cookies[0]
+
+    response = await client.get("/")
+    assert "Set-Cookie" not in response.headers
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 200
+
+    response = await client.post("/", form={"csrf_token": token})
+    assert response.status_code == 200
+
+    client.cookie_jar.clear()  # type: ignore
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 400
+    assert COOKIE_TOKEN_MISSING in await response.get_data(as_text=True)
+
+
+@pytest.mark.asyncio
+async def test_config_snapshot(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests config changes only apply once the settings are reloaded.
+    """
+    settings = app.extensions["csrf_settings"]
+    assert settings.methods == frozenset(["POST", "PUT", "PATCH", "DELETE"])
+    assert settings.headers == ("X-CSRFToken", "X-CSRF-Token")
+
+    app.config["WTF_CSRF_METHODS"] = ["PUT"]
+    response = await client.post("/")
+    assert response.status_code == 400
+
+    await app.startup()
+    response = await client.post("/")
+    assert response.status_code == 200
+    assert app.extensions["csrf_settings"] is not settings
+
+    async with app.app_context():
+        app.config["WTF_CSRF_METHODS"] = ["POST"]
+        csrf.reload_config()
+
+    response = await client.post("/")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_metrics(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests the CSRF check records counters and timings.
+    """
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    await client.post("/")
+    await client.post("/", headers={"X-CSRF-Token": token})
+    await client.post("/", form={"csrf_token": token})
+    await client.post("/", form={"csrf_token": "bad"})
+
+    counters = csrf.metrics.counters
+    assert counters["checked"] == 4
+    assert counters["passed"] == 2
+    assert counters["source:none"] == 1
+    assert counters["source:headers"] == 1
+    assert counters["source:form"] == 2
+    assert counters[f"failure:{TOKEN_MISSING}"] == 1
+    assert counters[f"failure:{TOKEN_INVALID}"] == 1
+    assert csrf.metrics.histograms["parse_time"].count == 4
+    assert csrf.metrics.histograms["verify_time"].count == 4
+
+
+@pytest.mark.asyncio
+async def test_one_time_tokens(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests a token can only be submitted once with WTF_CSRF_ONE_TIME.
+    """
+    app.config["WTF_CSRF_ONE_TIME"] = True
+    csrf.reload_config(app)
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 200
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 400
+    assert TOKEN_USED in await response.get_data(as_text=True)
+    assert csrf.metrics.counters[f"failure:{TOKEN_USED}"] == 1
+
+
+@pytest.mark.asyncio
+async def test_one_time_overflow(app: Quart, csrf: CSRFProtect) -> None:
+    """
+    Tests replay filter overflows are counted in the metrics.
+    """
+    app.config["WTF_CSRF_ONE_TIME_MAX_BYTES"] = 1024
+    csrf.reload_config(app)
+
+    async with app.test_request_context("/"):
+        for _ in range(200):
+            g.pop("_csrf_consumed_tokens", None)
+            token = generate_csrf(one_time=True)
+
+            try:
+                validate_csrf(token, one_time=True)
+            except ValidationError as error:
+                # A false positive of the tiny filters.
+                assert str(error) == TOKEN_USED
+
+    assert csrf.metrics.counters["one_time_overflow"] > 0
+
+
+@pytest.mark.asyncio
+async def test_one_time_time_limit(app: Quart, csrf: CSRFProtect) -> None:
+    """
+    Tests one-time tokens require a time limit.
+    """
+    async with app.test_request_context("/"):
+        token = generate_csrf(one_time=True)
+
+    app.config["WTF_CSRF_TIME_LIMIT"] = None
+    csrf.reload_config(app)
+
+    async with app.test_request_context("/"):
+        with pytest.raises(RuntimeError, match=ONE_TIME_TIME_LIMIT):
+            generate_csrf(one_time=True)
+
+        with pytest.raises(RuntimeError, match=ONE_TIME_TIME_LIMIT):
+            validate_csrf(token, one_time=True)
+
+        assert generate_csrf(one_time=True, time_limit=60)
+
+
+@pytest.mark.asyncio
+async def test_one_time_full(app: Quart, csrf: CSRFProtect) -> None:
+    """
+    Tests one-time tokens are rejected once the replay filter is full.
+    """
+    app.config["WTF_CSRF_ONE_TIME_MAX_BYTES"] = 1024
+    csrf.reload_config(app)
+
+    async with app.test_request_context("/"):
+        with pytest.raises(ValidationError, match=TOKEN_NOT_RECORDED):
+            for _ in range(2000):
+                g.pop("_csrf_consumed_tokens", None)
+                token = generate_csrf(one_time=True)
+
+                try:
+                    validate_csrf(token, one_time=True)
+                except ValidationError as error:
+                    if str(error) == TOKEN_USED:
+                        continue  # A false positive of the tiny filters.
+                    raise
+
+
+@pytest.mark.asyncio
+async def test_scoped_tokens(app: Quart, client: TestClientProtocol) -> None:
+    """
+    Tests tokens scoped to an endpoint pass on that endpoint only.
+    """
+    @app.route("/scoped", methods=["GET", "POST"])
+    async def scoped() -> str:
+        return generate_csrf(scope="scoped")
+
+    response = await client.get("/scoped")
+    token = await response.get_data(as_text=True)
+
+    response = await client.post("/scoped", headers={"X-CSRF-Token": token})
+    assert response.status_code == 200
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 400
+    assert TOKEN_NO_MATCH in await response.get_data(as_text=True)
+
+
+@pytest.mark.asyncio
+async def test_websocket_protected(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol
+) -> None:
+    """
+    Tests websocket handshakes need a token when WTF_CSRF_WEBSOCKET is set.
+    """
+    app.config["WTF_CSRF_WEBSOCKET"] = True
+    csrf.reload_config(app)
+
+    @app.websocket("/ws")
+    async def ws() -> None:
+        await websocket.accept()
+        await websocket.send("connected")
+
+    @app.websocket("/open")
+    @csrf.exempt
+    async def open_ws() -> None:
+        await websocket.send("connected")
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    with pytest.raises(WebsocketResponseError) as error:
+        async with client.websocket("/ws") as connection:
+            await connection.receive()
+    assert error.value.response.status_code == 400
+    assert TOKEN_MISSING in await error.value.response.get_data(as_text=True)
+
+    with pytest.raises(WebsocketResponseError) as error:
+        async with client.websocket(
+            "/ws", query_string={"csrf_token": "invalid"}
+        ) as connection:
+            await connection.receive()
+    assert error.value.response.status_code == 400
+
+    for kwargs in (
+        {"query_string": {"csrf_token": token}},
+        # The test client ignores its subprotocols argument.
+        {"scope_base": {"subprotocols": ["chat", f"csrf.{token}"]}},
+        {"headers": {"X-CSRFToken": token}},
+    ):
+        async with client.websocket("/ws", **kwargs) as connection:
+            assert await connection.receive() == "connected"
+
+    async with client.websocket("/open") as connection:
+        assert await connection.receive() == "connected"
+
+    assert csrf.metrics.counters["source:subprotocol"] == 1
+    assert csrf.metrics.counters["source:query"] == 2
+
+
+@pytest.mark.asyncio
+async def test_websocket_not_protected_by_default(
+    app: Quart, client: TestClientProtocol
+) -> None:
+    """
+    Tests websockets are not checked unless WTF_CSRF_WEBSOCKET is set.
+    """
+    @app.websocket("/ws")
+    async def ws() -> None:
+        await websocket.send("connected")
+
+    async with client.websocket("/ws") as connection:
+        assert await connection.receive() == "connected"
+
+
+@pytest.mark.asyncio
+async def test_json_token(
+    app: Quart, csrf: CSRFProtect, client: TestClientProtocol,
+    monkeypatch: Any
+) -> None:
+    """
+    Tests the token is read from a JSON body, which is only parsed once.
+    """
+    loads = []
+    json_loads = app.json.loads
+
+    def counting_loads(data: str, **kwargs: Any) -> Any:
+        loads.append(data)
+        return json_loads(data, **kwargs)
+
+    monkeypatch.setattr(app.json, "loads", counting_loads)
+
+    class NameForm(QuartForm):
+        name = StringField()
+
+    @app.route("/json", methods=["POST"])
+    async def json_view() -> str:
+        form = await NameForm.create_form()
+        return form.name.data
+
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+
+    response = await client.post(
+        "/json", json={"csrf_token": token, "name": "quart"}
+    )
+    assert response.status_code == 200
+    assert await response.get_data(as_text=True) == "quart"
+    assert len(loads) == 1
+    assert csrf.metrics.counters["source:json"] == 1
+
+    app.config["WTF_CSRF_JSON_KEY"] = "_csrf"
+    csrf.reload_config(app)
+
+    response = await client.post("/json", json={"csrf_token": token})
+    assert response.status_code == 400
+
+    response = await client.post("/json", json={"_csrf": token, "name": "x"})
+    assert response.status_code == 200
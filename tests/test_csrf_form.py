@@ -8,10 +8,13 @@ from quart import Quart, g, request, session
 from quart.typing import TestClientProtocol
 from wtforms import ValidationError
 
-from quart_wtf import QuartForm
+from quart_wtf import QuartForm, cache, utils
 from quart_wtf.const import (TOKEN_EXPIRED, TOKEN_INVALID, TOKEN_MISSING,
-                             TOKEN_NO_MATCH, SESSION_TOKEN_MISSING)
-from quart_wtf.utils import generate_csrf, validate_csrf, logger
+                             TOKEN_NO_MATCH, TOKEN_NOT_ONE_TIME, TOKEN_USED,
+                             SESSION_TOKEN_MISSING)
+from quart_wtf.utils import (_get_serializer, _key_id, _signed_tokens,
+                             _verified_tokens, generate_csrf, validate_csrf,
+                             logger)
 
 
 @pytest.fixture
@@ -73,6 +76,22 @@ async def test_token_cached(app: Quart) -> None:
         assert generate_csrf() == generate_csrf()
 
 
+@pytest.mark.asyncio
+async def test_token_generated_lazily(app: Quart) -> None:
+    """
+    Test a form only generates its token when the token is used.
+    """
+    async with app.test_request_context("/"):
+        form = QuartForm()
+        assert "csrf_token" not in session
+        assert "csrf_token" not in g
+
+        assert f'value="{form.csrf_token.current_token}"' in \
+            str(form.csrf_token)
+        assert "csrf_token" in session
+        assert form.csrf_token.current_token == g.csrf_token
+
+
 @pytest.mark.asyncio
 async def test_validate(app: Quart) -> None:
     """
@@ -82,6 +101,158 @@ async def test_validate(app: Quart) -> None:
         validate_csrf(generate_csrf())
 
 
+@pytest.mark.asyncio
+async def test_serializer_reused(app: Quart) -> None:
+    """
+    Test the signing serializer is shared between calls and keyed by
+    the secret key.
+    """
+    async with app.test_request_context("/"):
+        serial = _get_serializer(app.secret_key)
+        assert _get_serializer(app.secret_key) is serial
+        assert serial.make_signer() is serial.make_signer()
+        assert _get_serializer("rotated") is not serial
+
+        token = generate_csrf()
+        assert serial.loads(token) == session["csrf_token"]
+
+        app.secret_key = "rotated"
+        error = pytest.raises(ValidationError, validate_csrf, token)
+        assert str(error.value) == TOKEN_INVALID
+
+
+@pytest.mark.asyncio
+async def test_signed_token_reuse(app: Quart, monkeypatch: Any) -> None:
+    """
+    Test a signed token is reused across requests within the reuse window.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+    signed = []
+    sign_token = utils._sign_token
+
+    def counting_sign(*args: Any, **kwargs: Any) -> str:
+        signed.append(args[0])
+        return sign_token(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "_sign_token", counting_sign)
+    app.config["WTF_CSRF_TOKEN_REUSE"] = 300
+    _signed_tokens.clear()
+
+    async with app.test_request_context("/"):
+        token = generate_csrf()
+        raw_token = session["csrf_token"]
+
+    async with app.test_request_context("/"):
+        session["csrf_token"] = raw_token
+        assert generate_csrf() == token
+        validate_csrf(token)
+        assert generate_csrf(one_time=True) != token
+
+    assert len(signed) == 2
+    now[0] += 300
+
+    async with app.test_request_context("/"):
+        session["csrf_token"] = raw_token
+        generate_csrf()
+
+    assert len(signed) == 3
+
+
+@pytest.mark.asyncio
+async def test_verified_token_cache(app: Quart, monkeypatch: Any) -> None:
+    """
+    Test repeated validations are served from the verified token cache
+    while keeping the expiry rules.
+    """
+    app.config["WTF_CSRF_VERIFY_CACHE_SIZE"] = 8
+    _verified_tokens.clear()
+
+    async with app.test_request_context("/"):
+        token = generate_csrf()
+        validate_csrf(token)
+        assert len(_verified_tokens) == 1
+
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("serializer should not be used")
+
+        monkeypatch.setattr(_get_serializer(app.secret_key), "loads", fail)
+        validate_csrf(token)
+
+        error = pytest.raises(ValidationError, validate_csrf,
+                              token, time_limit=-1)
+        assert str(error.value) == TOKEN_EXPIRED
+        assert len(_verified_tokens) == 0
+
+
+@pytest.mark.asyncio
+async def test_compact_token_format(app: Quart) -> None:
+    """
+    Test the compact token format and that signed tokens in the old format
+    are still accepted.
+    """
+    app.config["WTF_CSRF_TOKEN_FORMAT"] = "compact"
+
+    async with app.test_request_context("/"):
+        token = generate_csrf()
+        assert token.startswith("v1.")
+        validate_csrf(token)
+
+        old_token = _get_serializer(app.secret_key).dumps(
+            session["csrf_token"]
+        )
+        assert len(token) < len(old_token)
+        validate_csrf(old_token)
+
+        error = pytest.raises(ValidationError, validate_csrf,
+                              token, time_limit=-1)
+        assert str(error.value) == TOKEN_EXPIRED
+
+        # Change a character whose bits are all used, the last character
+        # of base64 can carry ignored padding bits.
+        bad = "B" if token[-3] == "A" else "A"
+        error = pytest.raises(ValidationError, validate_csrf,
+                              token[:-3] + bad + token[-2:])
+        assert str(error.value) == TOKEN_INVALID
+
+        error = pytest.raises(ValidationError, validate_csrf, "v1.!!")
+        assert str(error.value) == TOKEN_INVALID
+
+        other_token = generate_csrf(token_key="other_csrf")
+        error = pytest.raises(ValidationError, validate_csrf, other_token)
+        assert str(error.value) == TOKEN_NO_MATCH
+
+
+@pytest.mark.parametrize("token_format", ["itsdangerous", "compact"])
+@pytest.mark.asyncio
+async def test_secret_key_rotation(app: Quart, token_format: str) -> None:
+    """
+    Test tokens are tagged with the id of the newest key and stay valid
+    while their key is in the rotation list.
+    """
+    app.config["WTF_CSRF_TOKEN_FORMAT"] = token_format
+    app.config["WTF_CSRF_SECRET_KEY"] = ["old", "new"]
+
+    async with app.test_request_context("/"):
+        legacy = generate_csrf(secret_key="old")
+        del g.csrf_token
+
+        token = generate_csrf()
+        assert token.startswith(_key_id("new") + "~")
+        validate_csrf(token)
+        validate_csrf(legacy)
+
+        app.config["WTF_CSRF_SECRET_KEY"] = ["new", "newer"]
+        validate_csrf(token)
+
+        del g.csrf_token
+        assert generate_csrf().startswith(_key_id("newer") + "~")
+
+        app.config["WTF_CSRF_SECRET_KEY"] = ["newer"]
+        error = pytest.raises(ValidationError, validate_csrf, token)
+        assert str(error.value) == TOKEN_INVALID
+
+
 @pytest.mark.asyncio
 async def test_validation_errors(app: Quart) -> None:
     """
@@ -156,3 +327,144 @@ async def test_validate_error_logged(
         await form.validate()
         assert len(messages) == 1
         assert messages[0] == TOKEN_MISSING
+
+
+@pytest.mark.asyncio
+async def test_form_csrf_cookie_mode(
+    app: Quart, client: TestClientProtocol
+) -> None:
+    """
+    Test form CSRF using the cookie mode without the extension.
+    """
+    app.config["WTF_CSRF_MODE"] = "cookie"
+
+    @app.route("/", methods=["GET", "POST"])
+    async def index() -> Any:
+        form = await QuartForm.create_form()
+
+        if await form.validate_on_submit():
+            return "good"
+
+        assert "csrf_token" not in session
+        return form.csrf_token.current_token
+
+    response = await client.get("/")
+    token = await response.get_data(as_text=True)
+    cookie = response.headers["Set-Cookie"]
+    assert cookie.startswith("csrf_token=")
+
+    response = await client.post("/", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == "good"
+
+
+@pytest.mark.asyncio
+async def test_one_time_token(app: Quart) -> None:
+    """
+    Test one-time tokens are unique and accepted only once.
+    """
+    async with app.test_request_context("/"):
+        token = generate_csrf(one_time=True)
+        raw_token = session["csrf_token"]
+        assert token != generate_csrf(one_time=True)
+
+        validate_csrf(token)
+        validate_csrf(token, one_time=True)
+        validate_csrf(token, one_time=True)  # same request
+
+        with pytest.raises(ValidationError) as error:
+            validate_csrf(generate_csrf(), one_time=True)
+        assert str(error.value) == TOKEN_NOT_ONE_TIME
+
+    async with app.test_request_context("/"):
+        session["csrf_token"] = raw_token
+        with pytest.raises(ValidationError) as error:
+            validate_csrf(token, one_time=True)
+        assert str(error.value) == TOKEN_USED
+
+
+@pytest.mark.asyncio
+async def test_form_one_time_token(
+    app: Quart, client: TestClientProtocol
+) -> None:
+    """
+    Test a form with one-time tokens rejects a replayed submission.
+    """
+    class PaymentForm(QuartForm):
+        class Meta:
+            csrf_one_time = True
+
+    @app.route("/", methods=["GET", "POST"])
+    async def index() -> Any:
+        form = await PaymentForm.create_form()
+
+        if await form.validate_on_submit():
+            return "good"
+
+        if form.errors:
+            return form.csrf_token.errors[0]
+        return form.csrf_token.current_token
+
+    response = await client.get("/")
+    token = await response.get_data(as_text=True)
+
+    response = await client.post("/", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == "good"
+
+    response = await client.post("/", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == TOKEN_USED
+
+
+@pytest.mark.asyncio
+async def test_scoped_token(app: Quart) -> None:
+    """
+    Test scoped tokens are only accepted for their scope.
+    """
+    async with app.test_request_context("/"):
+        token = generate_csrf(scope="checkout")
+        assert token != generate_csrf()
+        assert token == generate_csrf(scope="checkout")
+        assert list(session) == ["csrf_token"]
+
+        validate_csrf(token, scope="checkout")
+
+        for scope in (None, "profile"):
+            with pytest.raises(ValidationError) as error:
+                validate_csrf(token, scope=scope)
+            assert str(error.value) == TOKEN_NO_MATCH
+
+        with pytest.raises(ValidationError):
+            validate_csrf(generate_csrf(), scope="checkout")
+
+
+@pytest.mark.asyncio
+async def test_form_scoped_token(
+    app: Quart, client: TestClientProtocol
+) -> None:
+    """
+    Test a form scoped to its endpoint rejects tokens from other forms.
+    """
+    class ScopedForm(QuartForm):
+        class Meta:
+            csrf_scope = True
+
+    async def view() -> Any:
+        form = await ScopedForm.create_form()
+
+        if await form.validate_on_submit():
+            return "good"
+
+        if form.errors:
+            return form.csrf_token.errors[0]
+        return form.csrf_token.current_token
+
+    app.add_url_rule("/a", "a", view, methods=["GET", "POST"])
+    app.add_url_rule("/b", "b", view, methods=["GET", "POST"])
+
+    response = await client.get("/a")
+    token = await response.get_data(as_text=True)
+
+    response = await client.post("/b", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == TOKEN_NO_MATCH
+
+    response = await client.post("/a", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == "good"
@@ -0,0 +1,158 @@
+"""
+tests.test_limits
+"""
+import asyncio
+
+import pytest
+from quart import Quart
+from wtforms import StringField  # type: ignore
+
+from quart_wtf import QuartForm
+from quart_wtf.const import LIMIT_NOT_SET
+from quart_wtf.limits import (
+    concurrency_limit,
+    get_resources,
+    get_semaphore,
+    set_concurrency_limit
+)
+
+# pylint: skip-file
+
+
+class Tracker:
+    """
+    Records the most validators running at once.
+    """
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self) -> None:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(.01)
+        self.running -= 1
+
+
+tracker = Tracker()
+
+
+class CappedForm(QuartForm):
+    """
+    Form with three async validators, two allowed at once.
+    """
+    class Meta:
+        csrf = False
+        async_concurrency = 2
+
+    field1 = StringField()
+    field2 = StringField()
+    field3 = StringField()
+
+    async def async_validate_field1(self, field):  # type: ignore
+        await tracker()
+
+    async def async_validate_field2(self, field):  # type: ignore
+        await tracker()
+
+    async def async_validate_field3(self, field):  # type: ignore
+        await tracker()
+
+
+class ResourceForm(QuartForm):
+    """
+    Form with validators sharing a named resource.
+    """
+    class Meta:
+        csrf = False
+
+    field1 = StringField()
+    field2 = StringField()
+
+    @concurrency_limit(1, resource="test-db")
+    async def async_validate_field1(self, field):  # type: ignore
+        await tracker()
+
+    @concurrency_limit(resource="test-db")
+    async def async_validate_field2(self, field):  # type: ignore
+        await tracker()
+
+
+@pytest.fixture(autouse=True)
+def reset_tracker() -> None:
+    tracker.running = tracker.peak = 0
+
+
+@pytest.mark.asyncio
+async def test_form_cap(app: Quart) -> None:
+    """
+    Tests the form's cap bounds its running async validators.
+    """
+    async with app.test_request_context("/"):
+        assert await CappedForm().validate()
+        assert tracker.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_resource_limit(app: Quart) -> None:
+    """
+    Tests a named resource's limit is shared between forms.
+    """
+    async with app.test_request_context("/"):
+        results = await asyncio.gather(
+            ResourceForm().validate(), ResourceForm().validate()
+        )
+        assert all(results)
+        assert tracker.peak == 1
+
+
+@pytest.mark.asyncio
+async def test_limit_timeout(app: Quart) -> None:
+    """
+    Tests waiting for a limit counts towards the timeout.
+    """
+    async with app.test_request_context("/"):
+        async with get_semaphore("test-db"):
+            form = ResourceForm(meta={"async_timeout": .01})
+            assert not await form.validate()
+
+        assert form.errors == {
+            "field1": ("The validation timed out.",),
+            "field2": ("The validation timed out.",)
+        }
+        assert not get_semaphore("test-db").locked()
+
+
+def test_concurrency_limit() -> None:
+    """
+    Tests stacked limits are acquired in a stable order.
+    """
+    @concurrency_limit(resource="test-b")
+    @concurrency_limit(2, resource="test-a")
+    @concurrency_limit(3)
+    async def validator(form, field):  # type: ignore
+        pass
+
+    assert get_resources(validator) == (
+        "test-a",
+        "test-b",
+        f"{__name__}.test_concurrency_limit.<locals>.validator"
+    )
+
+    with pytest.raises(TypeError):
+        concurrency_limit()
+
+    with pytest.raises(ValueError):
+        set_concurrency_limit("test-a", 0)
+
+
+@pytest.mark.asyncio
+async def test_limit_not_set() -> None:
+    """
+    Tests a resource must have a limit before it is used.
+    """
+    with pytest.raises(RuntimeError, match=LIMIT_NOT_SET.format("test-c")):
+        get_semaphore("test-c")
+
+    set_concurrency_limit("test-c", 4)
+    assert get_semaphore("test-c")._value == 4
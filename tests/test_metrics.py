@@ -0,0 +1,50 @@
+"""
+tests.test_metrics
+"""
+from typing import List, Tuple
+
+from quart_wtf.metrics import CSRFMetrics, Histogram
+
+
+def test_histogram_percentile() -> None:
+    """
+    Tests percentiles are reported as bucket upper bounds.
+    """
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    assert histogram.percentile(50) == 0.0
+
+    for value in (0.0005, 0.0005, 0.005, 0.05):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.percentile(50) == 0.001
+    assert histogram.percentile(75) == 0.01
+    assert histogram.percentile(99) == 0.1
+
+    histogram.observe(5)
+    assert histogram.percentile(100) == float("inf")
+
+
+def test_metrics_callback() -> None:
+    """
+    Tests callbacks receive every update until disconnected.
+    """
+    metrics = CSRFMetrics()
+    events: List[Tuple[str, float]] = []
+
+    @metrics.connect
+    def record(name: str, value: float) -> None:
+        events.append((name, value))
+
+    metrics.incr("checked")
+    metrics.observe("verify_time", 0.002)
+    metrics.disconnect(record)
+    metrics.incr("checked")
+
+    assert events == [("checked", 1), ("verify_time", 0.002)]
+    assert metrics.counters["checked"] == 2
+    assert metrics.histograms["verify_time"].count == 1
+
+    metrics.reset()
+    assert not metrics.counters
+    assert not metrics.histograms
@@ -0,0 +1,120 @@
+"""
+tests.test_replay
+"""
+from typing import Any
+
+import pytest
+
+from quart_wtf import replay
+from quart_wtf.replay import BloomFilter, ReplayFilter, ReplayFilterFull
+
+
+def test_bloom_filter() -> None:
+    """
+    Tests items added to the Bloom filter are always found.
+    """
+    bloom = BloomFilter(size=1024, hashes=7)
+    items = [f"token-{index}".encode() for index in range(200)]
+
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == 200
+    assert sum(f"other-{index}".encode() in bloom for index in range(1000)) < 50
+
+
+def test_replay_filter(monkeypatch: Any) -> None:
+    """
+    Tests items are rejected within the window and forgotten after it.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(replay, "time", lambda: now[0])
+    replay_filter = ReplayFilter(window=100, max_bytes=5000, error_rate=0.001)
+
+    assert replay_filter.add(b"token")
+    assert not replay_filter.add(b"token")
+
+    now[0] += 100
+    assert b"token" in replay_filter
+    assert replay_filter.add(b"other")
+
+    now[0] += 50
+    assert b"token" not in replay_filter
+    assert len(replay_filter._filters) <= replay_filter.buckets + 1
+
+
+def test_replay_filter_memory() -> None:
+    """
+    Tests the memory ceiling is shared between the buckets.
+    """
+    replay_filter = ReplayFilter(
+        window=3600, max_bytes=1024 * 1024, error_rate=0.001, buckets=4
+    )
+    assert replay_filter.bucket_size * 5 <= 1024 * 1024
+    assert replay_filter.hashes == 10
+    assert replay_filter.capacity > 100000
+
+
+def test_replay_filter_overflow() -> None:
+    """
+    Tests a full bucket starts another filter instead of raising the false
+    positive rate.
+    """
+    overflows = []
+    replay_filter = ReplayFilter(
+        window=3600,
+        max_bytes=5 * 1024,
+        error_rate=0.001,
+        on_overflow=lambda: overflows.append(1)
+    )
+    items = [f"token-{index}".encode() for index in range(2000)]
+    rejected = sum(not replay_filter.add(item) for item in items)
+
+    assert rejected < 2000 * 0.02
+    assert not any(replay_filter.add(item) for item in items)
+    assert replay_filter.overflows == len(overflows) > 0
+
+
+def test_replay_filter_full() -> None:
+    """
+    Tests the memory ceiling is never exceeded and a full filter fails
+    closed.
+    """
+    replay_filter = ReplayFilter(
+        window=3600, max_bytes=5 * 1024, error_rate=0.001
+    )
+    added = []
+
+    with pytest.raises(ReplayFilterFull):
+        for index in range(10000):
+            item = f"token-{index}".encode()
+
+            if replay_filter.add(item):
+                added.append(item)
+
+    assert all(item in replay_filter for item in added)
+    assert sum(
+        len(bloom.bits)
+        for blooms in replay_filter._filters.values()
+        for bloom in blooms
+    ) <= 5 * 1024
+
+
+def test_replay_filter_extend(monkeypatch: Any) -> None:
+    """
+    Tests the window grows to cover longer time limits.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(replay, "time", lambda: now[0])
+    replay_filter = ReplayFilter(window=100, max_bytes=5000, error_rate=0.001)
+    replay_filter.extend(50)
+    assert replay_filter.window == 100
+
+    replay_filter.extend(300)
+    assert replay_filter.window == 300
+    assert replay_filter.buckets == 12
+
+    assert replay_filter.add(b"token")
+    now[0] += 250
+    assert not replay_filter.add(b"token")
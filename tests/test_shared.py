@@ -0,0 +1,200 @@
+"""
+tests.test_shared
+"""
+import multiprocessing
+from pathlib import Path
+from typing import Any
+
+import pytest
+from quart import Quart, session
+from wtforms import ValidationError
+
+from quart_wtf import shared
+from quart_wtf.const import TOKEN_NOT_RECORDED, TOKEN_USED
+from quart_wtf.shared import SharedCache, SharedCacheFull
+from quart_wtf.utils import generate_csrf, validate_csrf
+
+# pylint: skip-file
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> str:
+    """
+    Returns the path of a shared cache file.
+    """
+    return str(tmp_path / "csrf.cache")
+
+
+def _add_in_child(path: str, key: str, queue: Any) -> None:
+    queue.put(SharedCache(path, slots=64).add(key, 1))
+
+
+def test_shared_cache(path: str, monkeypatch: Any) -> None:
+    """
+    Tests getting, setting, expiring and removing entries.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(shared, "time", lambda: now[0])
+    cache = SharedCache(path, slots=50)
+    assert cache.slots == 64
+
+    cache.set(("key", 1), 42, ttl=10)
+    cache.set("forever", 7)
+    assert cache.get(("key", 1)) == 42
+    assert "forever" in cache
+    assert len(cache) == 2
+
+    assert not cache.add("forever", 8)
+    assert cache.add("other", 8)
+    assert cache.pop("other") == 8
+    assert cache.get("other") is None
+
+    now[0] += 10
+    assert cache.get(("key", 1), "missing") == "missing"
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_shared_between_instances(path: str) -> None:
+    """
+    Tests entries are shared through the file, even across processes.
+    """
+    first = SharedCache(path, slots=64)
+    second = SharedCache(path, slots=64)
+    first.set("key", 1)
+    assert second.get("key") == 1
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_add_in_child, args=(path, "key", queue))
+    process.start()
+    process.join()
+    assert queue.get() is False
+
+    process = context.Process(target=_add_in_child, args=(path, "new", queue))
+    process.start()
+    process.join()
+    assert queue.get() is True
+    assert first.get("new") == 1
+
+
+def test_shared_cache_full(path: str) -> None:
+    """
+    Tests the table never grows and the newest entries are kept.
+    """
+    cache = SharedCache(path, slots=16)
+
+    for index in range(100):
+        cache.set(index, index, ttl=index + 1)
+
+    assert len(cache) == 16
+    assert cache.get(99) == 99
+    assert Path(path).stat().st_size == 16 + 16 * 40
+
+
+def test_pinned_entries(path: str) -> None:
+    """
+    Tests pinned entries are never evicted and fail when there is no room.
+    """
+    cache = SharedCache(path, slots=16)
+    assert cache.add("pinned", 1, ttl=60, pin=True)
+
+    for index in range(40):
+        cache.set(index, index, ttl=1)
+
+    assert cache.get("pinned") == 1
+
+    for index in range(15):
+        cache.add(("pinned", index), 1, ttl=60, pin=True)
+
+    with pytest.raises(SharedCacheFull):
+        cache.add("one more", 1, ttl=60, pin=True)
+
+    cache.set("dropped", 1)
+    assert "dropped" not in cache
+    assert len(cache) == 16
+
+
+def test_shared_cache_mismatch(path: str) -> None:
+    """
+    Tests a file created with another size is rejected.
+    """
+    SharedCache(path, slots=16).set("key", 1)
+
+    with pytest.raises(RuntimeError):
+        SharedCache(path, slots=32).get("key")
+
+
+def test_torn_slot_is_a_miss(path: str) -> None:
+    """
+    Tests a slot with a bad checksum reads as empty.
+    """
+    cache = SharedCache(path, slots=16)
+    cache.set("key", 1)
+    data = cache._open()
+    index = next(i for i, entry in cache._scan(range(16)) if entry)
+    data[16 + index * 40 + 20] ^= 0xFF
+    assert cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_one_time_tokens(app: Quart, path: str) -> None:
+    """
+    Tests a one-time token spent by one worker is rejected by another.
+    """
+    app.secret_key = "shared secret"
+    app.config["WTF_CSRF_SHARED_CACHE"] = SharedCache(path, slots=64)
+
+    async with app.test_request_context("/"):
+        token = generate_csrf(one_time=True)
+        raw_token = session["csrf_token"]
+        validate_csrf(token, one_time=True)
+
+    # Another worker, with its own instance mapping the same file.
+    app.config["WTF_CSRF_SHARED_CACHE"] = SharedCache(path, slots=64)
+
+    async with app.test_request_context("/"):
+        session["csrf_token"] = raw_token
+        validate_csrf(generate_csrf())
+        assert len(app.config["WTF_CSRF_SHARED_CACHE"]) == 2
+
+        with pytest.raises(ValidationError) as error:
+            validate_csrf(token, one_time=True)
+        assert str(error.value) == TOKEN_USED
+
+
+@pytest.mark.asyncio
+async def test_spent_tokens_not_evicted(app: Quart, path: str) -> None:
+    """
+    Tests spent one-time tokens stay rejected however full the table is,
+    and tokens are rejected when they cannot be recorded.
+    """
+    app.secret_key = "shared secret"
+    cache = app.config["WTF_CSRF_SHARED_CACHE"] = SharedCache(path, slots=16)
+
+    async with app.test_request_context("/"):
+        token = generate_csrf(one_time=True)
+        raw_token = session["csrf_token"]
+        validate_csrf(token, one_time=True)
+
+    for index in range(40):
+        cache.set(index, index, ttl=60)
+
+    for index in range(15):
+        cache.add(("filler", index), 1, ttl=60, pin=True)
+
+    async with app.test_request_context("/"):
+        session["csrf_token"] = raw_token
+
+        with pytest.raises(ValidationError) as error:
+            validate_csrf(token, one_time=True)
+        assert str(error.value) == TOKEN_USED
+
+    async with app.test_request_context("/"):
+        fresh = generate_csrf(one_time=True)
+
+        with pytest.raises(ValidationError) as error:
+            validate_csrf(fresh, one_time=True)
+        assert str(error.value) == TOKEN_NOT_RECORDED
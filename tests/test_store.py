@@ -0,0 +1,221 @@
+"""
+tests.test_store
+"""
+from typing import Any, Dict
+
+import pytest
+from quart import Quart, Response, render_template_string, request
+from quart.typing import TestClientProtocol
+
+from quart_wtf import CSRFProtect, QuartForm
+from quart_wtf.const import SESSION_TOKEN_MISSING, STORE_NOT_LOADED
+from quart_wtf.store import MemoryTokenStore, RedisTokenStore
+from quart_wtf.utils import generate_csrf, load_csrf_token
+
+# pylint: skip-file
+
+
+class CountingStore(MemoryTokenStore):
+    """
+    Memory store that counts reads.
+    """
+    reads = 0
+
+    async def get(self, key: str) -> str | None:
+        self.reads += 1
+        return await super().get(key)
+
+
+class FakeRedis:
+    """
+    Minimal async client with the Redis commands used by the store.
+    """
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.expiry: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: Any = None) -> None:
+        self.data[key] = value.encode()
+        self.expiry[key] = ex
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+
+@pytest.fixture
+def store() -> CountingStore:
+    """
+    Returns a memory token store.
+    """
+    return CountingStore()
+
+
+@pytest.fixture
+def app(app: Quart, store: MemoryTokenStore) -> Quart:
+    """
+    App fixture using the token store mode.
+    """
+    app.secret_key = "some_secret_you_would_not_guess"
+    app.config["WTF_CSRF_MODE"] = "store"
+    app.config["WTF_CSRF_TOKEN_STORE"] = store
+    CSRFProtect(app)
+
+    @app.route("/", methods=["GET", "POST"])
+    async def index() -> None:
+        pass
+
+    @app.route("/form", methods=["GET", "POST"])
+    async def form() -> str:
+        form = await QuartForm.create_form()
+
+        if await form.validate_on_submit():
+            return "valid"
+        return form.csrf_token.current_token
+
+    @app.route("/page")
+    async def page() -> str:
+        return await render_template_string("{{ csrf_token() }}")
+
+    @app.route("/exempt", methods=["GET", "POST"])
+    async def exempt() -> str:
+        return "exempt"
+
+    app.extensions["csrf"].exempt(exempt)
+
+    @app.after_request
+    async def add_csrf_header(response: Response) -> Response:
+        if request.endpoint == "index" and request.method == "GET":
+            await load_csrf_token()
+            response.headers.set("X-CSRF-Token", generate_csrf())
+        return response
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_memory_store(store: MemoryTokenStore) -> None:
+    """
+    Tests the memory token store.
+    """
+    await store.set("key", "token")
+    assert await store.get("key") == "token"
+    await store.delete("key")
+    assert await store.get("key") is None
+
+    await store.set("key", "token", ttl=-1)
+    assert await store.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_store() -> None:
+    """
+    Tests the Redis token store adapter.
+    """
+    client = FakeRedis()
+    store = RedisTokenStore(client, prefix="test:")
+
+    await store.set("key", "token", ttl=60)
+    assert client.data == {"test:key": b"token"}
+    assert client.expiry == {"test:key": 60}
+    assert await store.get("key") == "token"
+
+    await store.delete("key")
+    assert await store.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_store_mode(
+    app: Quart, store: MemoryTokenStore, client: TestClientProtocol
+) -> None:
+    """
+    Tests raw tokens are kept in the store and the session is untouched.
+    """
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+    cookies = response.headers.getlist("Set-Cookie")
+    assert len(cookies) == 1
+    assert cookies[0].startswith("csrf_token=")
+    assert len(store._cache) == 1
+
+    response = await client.get("/")
+    assert "Set-Cookie" not in response.headers
+    assert len(store._cache) == 1
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 200
+
+    store._cache.clear()
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 400
+    assert SESSION_TOKEN_MISSING in await response.get_data(as_text=True)
+
+
+@pytest.mark.asyncio
+async def test_store_mode_form(app: Quart, client: TestClientProtocol) -> None:
+    """
+    Tests forms load the token from the store.
+    """
+    app.config["WTF_CSRF_CHECK_DEFAULT"] = False
+    app.extensions["csrf"].reload_config(app)
+
+    response = await client.get("/form")
+    token = await response.get_data(as_text=True)
+
+    response = await client.post("/form", form={"csrf_token": token})
+    assert await response.get_data(as_text=True) == "valid"
+
+
+@pytest.mark.asyncio
+async def test_store_not_loaded(app: Quart) -> None:
+    """
+    Tests the token must be loaded before it is used.
+    """
+    async with app.test_request_context("/"):
+        with pytest.raises(RuntimeError, match=STORE_NOT_LOADED):
+            generate_csrf()
+
+        await load_csrf_token()
+        assert generate_csrf()
+
+
+@pytest.mark.asyncio
+async def test_store_read_when_checked(
+    app: Quart, store: CountingStore, client: TestClientProtocol
+) -> None:
+    """
+    Tests the store is only read for requests that are checked.
+    """
+    response = await client.get("/")
+    token = response.headers["X-CSRF-Token"]
+    store.reads = 0
+
+    await client.get("/exempt")
+    await client.post("/exempt")
+    assert store.reads == 0
+
+    await client.post("/", headers={"X-CSRF-Token": token})
+    assert store.reads == 1
+
+    app.config["WTF_CSRF_ENABLED"] = False
+    app.extensions["csrf"].reload_config(app)
+    await client.post("/")
+    assert store.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_store_template(
+    app: Quart, store: CountingStore, client: TestClientProtocol
+) -> None:
+    """
+    Tests templates render the token on a GET without loading it first.
+    """
+    response = await client.get("/page")
+    assert response.status_code == 200
+    token = await response.get_data(as_text=True)
+    assert len(store._cache) == 1
+
+    response = await client.post("/", headers={"X-CSRF-Token": token})
+    assert response.status_code == 200